@@ -6,6 +6,8 @@ import logging
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.db.models import Avg, Count, Q
+from core.geo import segment_speeds_kmh
+from children.models import LocationFix
 from ..models import Child, Anomaly, Activity, Location, Device, Note
 
 logger = logging.getLogger(__name__)
@@ -86,18 +88,16 @@ class AnomalyDetectionSystem:
         """Detect location-based anomalies"""
         anomalies = []
         try:
-            # Get recent locations
-            recent_locations = Location.objects.filter(
-                child=child,
-                timestamp__gte=datetime.now() - timedelta(days=7)
-            ).order_by('timestamp')
+            # Get recent fixes with one indexed range scan
+            since = datetime.now() - timedelta(days=7)
+            lats, lons, times = LocationFix.objects.trajectory(child.id, since)
 
-            if not recent_locations:
+            if not len(lats):
                 return anomalies
 
             # Check for missing location updates
             expected_updates = 24 * 7  # hourly updates for 7 days
-            actual_updates = recent_locations.count()
+            actual_updates = len(lats)
             if actual_updates < expected_updates * 0.8:  # Less than 80% of expected updates
                 anomalies.append({
                     'type': 'location',
@@ -106,13 +106,9 @@ class AnomalyDetectionSystem:
                 })
 
             # Check for unusual movement patterns
-            locations_array = np.array([(loc.latitude, loc.longitude) for loc in recent_locations])
-            if len(locations_array) > 1:
-                # Calculate movement speed
-                distances = np.sqrt(np.sum(np.diff(locations_array, axis=0)**2, axis=1))
-                times = np.array([(loc.timestamp - recent_locations[i].timestamp).total_seconds() 
-                                for i, loc in enumerate(recent_locations[1:])])
-                speeds = distances / times
+            if len(lats) > 1:
+                # Calculate movement speed in km/h between consecutive fixes
+                speeds = segment_speeds_kmh(lats, lons, times)
 
                 # Detect unusual speeds
                 if np.any(speeds > 100):  # Speed threshold in km/h
@@ -123,7 +119,7 @@ class AnomalyDetectionSystem:
                     })
 
                 # Detect unusual locations
-                if np.any(recent_locations.filter(is_unusual=True)):
+                if Location.objects.filter(child=child, timestamp__gte=since, is_unusual=True).exists():
                     anomalies.append({
                         'type': 'location',
                         'description': 'Unusual locations detected',
@@ -266,18 +262,16 @@ class AnomalyDetectionSystem:
         """Detect movement during unusual hours (e.g., 11pm-5am)"""
         anomalies = []
         try:
-            recent_locations = Location.objects.filter(
-                child=child,
-                timestamp__gte=datetime.now() - timedelta(days=7)
-            )
-            for loc in recent_locations:
-                if loc.timestamp.hour >= 23 or loc.timestamp.hour < 5:
-                    anomalies.append({
-                        'type': 'location',
-                        'description': f'Movement detected at unusual hour: {loc.timestamp.strftime("%H:%M")}',
-                        'severity': 'medium'
-                    })
-                    break  # Only flag once per week
+            # First night-time fix of the week; only flag once per week
+            night_fix = LocationFix.objects.window(child.id, datetime.now() - timedelta(days=7)).filter(
+                Q(timestamp__hour__gte=23) | Q(timestamp__hour__lt=5)
+            ).values_list('timestamp', flat=True).first()
+            if night_fix:
+                anomalies.append({
+                    'type': 'location',
+                    'description': f'Movement detected at unusual hour: {night_fix.strftime("%H:%M")}',
+                    'severity': 'medium'
+                })
             return anomalies
         except Exception as e:
             logger.error(f"Error in time-of-day movement rule: {str(e)}")
@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+import joblib
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the inference latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class Artifact:
+    def __init__(self, obj, version, mtime, size, load_seconds, fallback=False):
+        self.obj = obj
+        self.version = version
+        self.mtime = mtime
+        self.size = size
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.fallback = fallback
+        self.checked_at = time.monotonic()
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.total_ms += ms
+
+    def as_dict(self):
+        count = sum(self.counts)
+        labels = [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}ms']
+        return {
+            'count': count,
+            'mean_ms': self.total_ms / count if count else 0.0,
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+class ModelRegistry:
+    """Process-wide cache of joblib artifacts keyed by path.
+
+    An artifact is loaded on first use (memory-mapped when mmap_mode is set) and shared by
+    every caller in the process. At most once per check_seconds the file is stat'ed; when
+    its mtime or size moved, it is hashed and reloaded only if the content changed. If a
+    load fails the previous artifact stays in use, or the caller's fallback when there is
+    none, and the failure is counted instead of hidden; the same error is logged once.
+    """
+
+    def __init__(self, mmap_mode, check_seconds):
+        self.mmap_mode = mmap_mode or None
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._artifacts = {}
+        self._errors = {}
+        self._last_error = {}
+        self._loads = {}
+        self._latency = {}
+
+    def get(self, path, fallback=None):
+        """The object stored at path. fallback() builds a stand-in when nothing can be loaded."""
+        artifact = self._artifacts.get(path)
+        if artifact is not None and time.monotonic() - artifact.checked_at < self.check_seconds:
+            return artifact.obj
+        with self._lock:
+            artifact = self._artifacts.get(path)
+            if artifact is None or time.monotonic() - artifact.checked_at >= self.check_seconds:
+                artifact = self._refresh(path, artifact, fallback)
+            return artifact.obj
+
+    def _refresh(self, path, current, fallback):
+        try:
+            stat = os.stat(path)
+            if current is not None and not current.fallback and (stat.st_mtime, stat.st_size) == (current.mtime, current.size):
+                current.checked_at = time.monotonic()
+                return current
+            version = _file_hash(path)
+            if current is not None and version == current.version:
+                # Touched but unchanged: keep the loaded object
+                current.mtime, current.size = stat.st_mtime, stat.st_size
+                current.checked_at = time.monotonic()
+                return current
+            started = time.perf_counter()
+            obj = joblib.load(path, mmap_mode=self.mmap_mode)
+            artifact = Artifact(obj, version, stat.st_mtime, stat.st_size, time.perf_counter() - started)
+            self._loads[path] = self._loads.get(path, 0) + 1
+            self._last_error.pop(path, None)
+            logger.info(f"Loaded model artifact {path} version {version[:12]} in {artifact.load_seconds:.3f}s")
+        except Exception as e:
+            self._errors[path] = self._errors.get(path, 0) + 1
+            if self._last_error.get(path) != str(e):
+                # Checked again every check_seconds; only a new error is worth another line
+                self._last_error[path] = str(e)
+                logger.error(f"Error loading model artifact {path}: {str(e)}")
+            if current is not None:
+                current.checked_at = time.monotonic()
+                return current
+            if fallback is None:
+                raise
+            artifact = Artifact(fallback(), None, None, None, 0.0, fallback=True)
+        self._artifacts[path] = artifact
+        return artifact
+
+    def invalidate(self, path):
+        """Forget an artifact so the next get() reloads it, e.g. after training overwrote the file."""
+        with self._lock:
+            self._artifacts.pop(path, None)
+
+    @contextmanager
+    def timed(self, name):
+        """Record the wall time of an inference call under name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._latency.setdefault(name, LatencyHistogram()).observe(ms)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'artifacts': {
+                    path: {
+                        'version': artifact.version[:12] if artifact.version else None,
+                        'fallback': artifact.fallback,
+                        'loaded_at': artifact.loaded_at,
+                        'load_seconds': artifact.load_seconds,
+                        'loads': self._loads.get(path, 0),
+                        'errors': self._errors.get(path, 0),
+                    }
+                    for path, artifact in self._artifacts.items()
+                },
+                'inference': {name: histogram.as_dict() for name, histogram in self._latency.items()},
+            }
+
+model_registry = ModelRegistry(settings.MODEL_MMAP_MODE, settings.MODEL_RELOAD_CHECK_SECONDS)
@@ -3,21 +3,28 @@ from django.dispatch import receiver
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
+def _anomaly_alert(instance):
+    return {
+        "type": "anomaly.alert",
+        "anomaly": {
+            "id": instance.id,
+            "child": str(instance.child) if instance.child else None,
+            "type": instance.anomaly_type,
+            "description": instance.description,
+            "severity": instance.severity,
+            "timestamp": instance.timestamp.isoformat(),
+        }
+    }
+
+def broadcast_high_severity_anomalies(anomalies):
+    """Push alerts for anomalies written with bulk_create, which does not send post_save."""
+    channel_layer = get_channel_layer()
+    for instance in anomalies:
+        if instance.severity == 'high':
+            async_to_sync(channel_layer.group_send)("anomalies", _anomaly_alert(instance))
+
 @receiver(post_save, sender=Anomaly)
 def broadcast_high_severity_anomaly(sender, instance, created, **kwargs):
     if created and instance.severity == 'high':
         channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            "anomalies",
-            {
-                "type": "anomaly.alert",
-                "anomaly": {
-                    "id": instance.id,
-                    "child": str(instance.child) if instance.child else None,
-                    "type": instance.anomaly_type,
-                    "description": instance.description,
-                    "severity": instance.severity,
-                    "timestamp": instance.timestamp.isoformat(),
-                }
-            }
-        ) 
\ No newline at end of file
+        async_to_sync(channel_layer.group_send)("anomalies", _anomaly_alert(instance))
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 from django.conf import settings
 from django.db.models import Avg, Count, Q
 from ..models import Child, RiskScore, Activity, Location, Device, Note
+from children.models import LocationFix
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +43,7 @@ class RiskScoringSystem:
                 timestamp__gte=datetime.now() - timedelta(days=7)
             )
             features.update({
-                'location_variance': self._calculate_location_variance(recent_locations),
+                'location_variance': self._calculate_location_variance(child),
                 'unusual_locations': self._count_unusual_locations(recent_locations),
                 'location_updates_frequency': self._calculate_update_frequency(recent_locations),
             })
@@ -110,12 +111,12 @@ class RiskScoringSystem:
             logger.error(f"Error calculating risk score for child {child.id}: {str(e)}")
             return None
 
-    def _calculate_location_variance(self, locations):
+    def _calculate_location_variance(self, child):
         """Calculate variance in location patterns"""
-        if not locations:
+        lats, lons, _ = LocationFix.objects.trajectory(child.id, datetime.now() - timedelta(days=7))
+        if not len(lats):
             return 0
-        coordinates = [(loc.latitude, loc.longitude) for loc in locations]
-        return np.var(coordinates)
+        return np.var(np.column_stack([lats, lons]))
 
     def _count_unusual_locations(self, locations):
         """Count locations outside normal boundaries"""
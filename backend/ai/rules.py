@@ -0,0 +1,158 @@
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+# Rule registry for anomaly detection.
+#
+# A window is a loader that fills one slice of data (e.g. 7 days of fixes) into the
+# ChildContext of every child in a cohort with a single query. A rule is a function
+# ctx -> list of anomaly dicts that declares the windows it reads and a relative cost.
+# RuleExecutor loads each window needed by its enabled rules once per cohort, runs
+# rules that share windows back to back (cheapest first) and profiles every rule.
+
+WINDOWS = {}
+RULES = {}
+
+class Rule:
+    def __init__(self, name, func, group, windows, cost):
+        self.name = name
+        self.func = func
+        self.group = group
+        self.windows = tuple(windows)
+        self.cost = cost
+
+    def __repr__(self):
+        return f"<Rule {self.name} group={self.group} windows={self.windows} cost={self.cost}>"
+
+def register_window(name, queries=1):
+    """Decorator for loader(contexts, now) that fills a data window for a cohort.
+
+    queries is the fixed number of queries the loader issues, whatever the cohort size.
+    """
+    def decorator(loader):
+        loader.queries = queries
+        WINDOWS[name] = loader
+        return loader
+    return decorator
+
+def register_rule(name, group, windows=(), cost=1):
+    """Decorator for rule(ctx) -> list of {'type', 'description', 'severity'} dicts."""
+    def decorator(func):
+        RULES[name] = Rule(name, func, group, windows, cost)
+        return func
+    return decorator
+
+class ChildContext:
+    """In-memory snapshot of the data windows loaded for one child."""
+
+    def __init__(self, child, now):
+        self.child = child
+        self.now = now
+
+class RuleStats:
+    def __init__(self, calls=0, hits=0, seconds=0.0, queries=0):
+        self.calls = calls
+        self.hits = hits
+        self.seconds = seconds
+        self.queries = queries
+
+    def add(self, other):
+        self.calls += other.calls
+        self.hits += other.hits
+        self.seconds += other.seconds
+        self.queries += other.queries
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.calls if self.calls else 0.0,
+            'seconds': self.seconds,
+            'queries': self.queries,
+        }
+
+@contextmanager
+def count_queries():
+    """Count queries on the default connection without turning on DEBUG query logging."""
+    counter = {'count': 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter['count'] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+class RuleExecutor:
+    """Runs the enabled rules of one group over cohorts of children and profiles them.
+
+    Disabled rules come from settings.ANOMALY_DISABLED_RULES unless given; windows
+    needed only by disabled rules are never loaded. Stats accumulate across run() calls
+    under the rule name, and under "window:<name>" for data loading.
+    """
+
+    def __init__(self, group, disabled=None):
+        disabled = set(settings.ANOMALY_DISABLED_RULES if disabled is None else disabled)
+        rules = [rule for rule in RULES.values() if rule.group == group and rule.name not in disabled]
+        # Rules reading the same windows run back to back, cheapest first
+        self.rules = sorted(rules, key=lambda rule: (rule.windows, rule.cost))
+        self.windows = []
+        for rule in self.rules:
+            for window in rule.windows:
+                if window not in self.windows:
+                    self.windows.append(window)
+        self.stats = {}
+
+    @property
+    def query_budget(self):
+        """Queries needed to load one cohort, independent of its size."""
+        return sum(WINDOWS[window].queries for window in self.windows)
+
+    def _stats(self, key):
+        return self.stats.setdefault(key, RuleStats())
+
+    def load(self, children, now=None):
+        now = now or timezone.now()
+        contexts = {child.id: ChildContext(child, now) for child in children}
+        for window in self.windows:
+            stats = self._stats(f'window:{window}')
+            started = time.perf_counter()
+            with count_queries() as queries:
+                WINDOWS[window](contexts, now)
+            stats.calls += 1
+            stats.seconds += time.perf_counter() - started
+            stats.queries += queries['count']
+        return contexts
+
+    def run(self, children, contexts=None):
+        """Evaluate every enabled rule for a cohort. Returns {child_id: [anomaly dicts]}."""
+        if contexts is None:
+            contexts = self.load(children)
+        results = {child_id: [] for child_id in contexts}
+        for rule in self.rules:
+            stats = self._stats(rule.name)
+            started = time.perf_counter()
+            with count_queries() as queries:
+                for child_id, ctx in contexts.items():
+                    found = rule.func(ctx)
+                    if found:
+                        results[child_id].extend(found)
+                        stats.hits += 1
+            stats.calls += len(contexts)
+            stats.seconds += time.perf_counter() - started
+            stats.queries += queries['count']
+        return results
+
+    def merge_stats(self, stats):
+        """Fold in stats collected elsewhere, e.g. returned by worker processes."""
+        for key, other in stats.items():
+            self._stats(key).add(other)
+
+    def report(self):
+        """Per-rule and per-window stats, most expensive first."""
+        return sorted(
+            ((key, stats.as_dict()) for key, stats in self.stats.items()),
+            key=lambda item: -item[1]['seconds'],
+        )
@@ -30,6 +30,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.audit.AuditContextMiddleware',
 ]
 
 ROOT_URLCONF = 'amagara_masya.urls'
@@ -94,4 +95,89 @@ CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels.layers.InMemoryChannelLayer',
     },
-} 
\ No newline at end of file
+} 
+
+# Upper bound on fixes accepted by a single bulk wearable upload
+WEARABLE_BULK_MAX_FIXES = int(os.environ.get('WEARABLE_BULK_MAX_FIXES', 5000))
+
+# How long the geofence engine trusts its cached CenterConfig before reloading
+GEOFENCE_CENTER_CACHE_SECONDS = int(os.environ.get('GEOFENCE_CENTER_CACHE_SECONDS', 60))
+
+# Dashboard updates are coalesced and flushed at most once per interval (0 = send immediately)
+DASHBOARD_BROADCAST_INTERVAL_MS = int(os.environ.get('DASHBOARD_BROADCAST_INTERVAL_MS', 250))
+
+# Number of dashboard patch messages kept so reconnecting clients can catch up without a snapshot
+DASHBOARD_PATCH_HISTORY = int(os.environ.get('DASHBOARD_PATCH_HISTORY', 1000))
+
+# Cursor pagination for the dashboard child-locations roster
+ROSTER_PAGE_SIZE = int(os.environ.get('ROSTER_PAGE_SIZE', 500))
+ROSTER_MAX_PAGE_SIZE = int(os.environ.get('ROSTER_MAX_PAGE_SIZE', 5000))
+
+# Anomaly rules to skip, comma separated (e.g. "negative_tracking_notes,rapid_movement"); see ai/rules.py
+ANOMALY_DISABLED_RULES = [name.strip() for name in os.environ.get('ANOMALY_DISABLED_RULES', '').split(',') if name.strip()]
+
+# Evaluate wearable fixes for anomalies as they are ingested (see children/streaming.py)
+ANOMALY_STREAMING_ENABLED = os.environ.get('ANOMALY_STREAMING_ENABLED', 'True') == 'True'
+
+# Trained model artifacts (joblib) used by ai.risk_scoring and ai.anomaly_detection
+ML_MODEL_PATH = os.environ.get('ML_MODEL_PATH', os.path.join(BASE_DIR, 'ml_models', 'risk_model.joblib'))
+ML_SCALER_PATH = os.environ.get('ML_SCALER_PATH', os.path.join(BASE_DIR, 'ml_models', 'risk_scaler.joblib'))
+ANOMALY_MODEL_PATH = os.environ.get('ANOMALY_MODEL_PATH', os.path.join(BASE_DIR, 'ml_models', 'anomaly_model.joblib'))
+ANOMALY_SCALER_PATH = os.environ.get('ANOMALY_SCALER_PATH', os.path.join(BASE_DIR, 'ml_models', 'anomaly_scaler.joblib'))
+
+# Model registry: joblib mmap_mode for loaded arrays ('' disables) and how often artifact files are checked for changes
+MODEL_MMAP_MODE = os.environ.get('MODEL_MMAP_MODE', 'r')
+MODEL_RELOAD_CHECK_SECONDS = int(os.environ.get('MODEL_RELOAD_CHECK_SECONDS', 30))
+
+# Trained escape-risk pipeline over children.risk.FEATURE_NAMES; a baseline model is used while it is missing
+ESCAPE_RISK_MODEL_PATH = os.environ.get('ESCAPE_RISK_MODEL_PATH', os.path.join(BASE_DIR, 'ml_models', 'escape_risk.joblib'))
+
+# Notification outbox (core/outbox.py): delivery threads, claim batch size, retry polling and backoff
+NOTIFICATION_INPROCESS_WORKER = os.environ.get('NOTIFICATION_INPROCESS_WORKER', 'True') == 'True'
+NOTIFICATION_WORKER_THREADS = int(os.environ.get('NOTIFICATION_WORKER_THREADS', 4))
+NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', 100))
+NOTIFICATION_POLL_SECONDS = int(os.environ.get('NOTIFICATION_POLL_SECONDS', 10))
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', 6))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.environ.get('NOTIFICATION_RETRY_BASE_SECONDS', 30))
+NOTIFICATION_RETRY_MAX_SECONDS = int(os.environ.get('NOTIFICATION_RETRY_MAX_SECONDS', 3600))
+
+# FCM push (core/push.py): HTTP v1 send endpoint, Firebase project, service account key file
+# and how many single-token requests are in flight at once
+FCM_ENDPOINT = os.environ.get('FCM_ENDPOINT', 'https://fcm.googleapis.com/v1/projects/{project_id}/messages:send')
+FCM_PROJECT_ID = os.environ.get('FCM_PROJECT_ID')
+FCM_CREDENTIALS_FILE = os.environ.get('FCM_CREDENTIALS_FILE', os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'))
+FCM_CONCURRENCY = int(os.environ.get('FCM_CONCURRENCY', 20))
+
+# Notification inbox: page sizes and how long a cached unread count is trusted
+NOTIFICATION_PAGE_SIZE = int(os.environ.get('NOTIFICATION_PAGE_SIZE', 50))
+NOTIFICATION_MAX_PAGE_SIZE = int(os.environ.get('NOTIFICATION_MAX_PAGE_SIZE', 200))
+NOTIFICATION_UNREAD_CACHE_SECONDS = int(os.environ.get('NOTIFICATION_UNREAD_CACHE_SECONDS', 300))
+
+# Buffered audit writer (core/audit.py): flush after this many entries or seconds; spool files survive crashes
+AUDIT_BUFFER_SIZE = int(os.environ.get('AUDIT_BUFFER_SIZE', 200))
+AUDIT_FLUSH_SECONDS = float(os.environ.get('AUDIT_FLUSH_SECONDS', 2))
+AUDIT_SPOOL_DIR = os.environ.get('AUDIT_SPOOL_DIR', os.path.join(BASE_DIR, 'audit_spool'))
+# Reverse proxies in front of the app that append to X-Forwarded-For; 0 ignores the header
+AUDIT_TRUSTED_PROXIES = int(os.environ.get('AUDIT_TRUSTED_PROXIES', 0))
+
+# Audit log reads and retention: API page sizes, days kept in AuditLog, where archive_audit_logs writes older months
+AUDIT_PAGE_SIZE = int(os.environ.get('AUDIT_PAGE_SIZE', 100))
+AUDIT_MAX_PAGE_SIZE = int(os.environ.get('AUDIT_MAX_PAGE_SIZE', 500))
+AUDIT_RETENTION_DAYS = int(os.environ.get('AUDIT_RETENTION_DAYS', 365))
+AUDIT_ARCHIVE_DIR = os.environ.get('AUDIT_ARCHIVE_DIR', os.path.join(BASE_DIR, 'audit_archive'))
+
+# Streaming CSV exports (core/export.py): rows fetched per database round trip and bytes buffered per response chunk
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+EXPORT_BUFFER_BYTES = int(os.environ.get('EXPORT_BUFFER_BYTES', 64 * 1024))
+
+# Background report jobs (reports/jobs.py): run in the web process or via process_reports, render threads and queue polling
+REPORT_INPROCESS_WORKER = os.environ.get('REPORT_INPROCESS_WORKER', 'True') == 'True'
+REPORT_WORKER_THREADS = int(os.environ.get('REPORT_WORKER_THREADS', 2))
+REPORT_POLL_SECONDS = int(os.environ.get('REPORT_POLL_SECONDS', 30))
+
+# Columnar analytics exports (reports/columnar.py): output directory and rows per fetch / record batch
+COLUMNAR_EXPORT_DIR = os.environ.get('COLUMNAR_EXPORT_DIR', os.path.join(BASE_DIR, 'columnar_exports'))
+COLUMNAR_CHUNK_SIZE = int(os.environ.get('COLUMNAR_CHUNK_SIZE', 10000))
+
+# Admin dashboard counters (core/metrics.py): longest trend window the API returns
+DASHBOARD_HISTORY_MAX_DAYS = int(os.environ.get('DASHBOARD_HISTORY_MAX_DAYS', 365))
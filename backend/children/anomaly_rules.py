@@ -0,0 +1,100 @@
+import numpy as np
+from datetime import timedelta
+from django.db.models import Count, Max
+from ai.rules import register_rule, register_window
+from core.geo import haversine_m
+from .models import LocationFix, Tracking
+try:
+    from textblob import TextBlob
+except ImportError:
+    TextBlob = None
+
+# Data windows and tracking rules shared by both anomaly detectors. Rules in the
+# 'tracking' group feed the children detect_anomalies command (admin notifications).
+
+@register_window('fixes')
+def load_fixes(contexts, now):
+    """Last 7 days of LocationFix per child as NumPy arrays, oldest first."""
+    for ctx in contexts.values():
+        ctx.fix_datetimes = []
+        ctx.lats = np.zeros(0)
+        ctx.lons = np.zeros(0)
+        ctx.fix_times = np.zeros(0)
+        ctx.fix_hours = np.zeros(0, dtype=int)
+    fixes = {}
+    for child_id, lat, lon, ts in LocationFix.objects.filter(child_id__in=list(contexts), timestamp__gte=now - timedelta(days=7)).order_by(
+            'child_id', 'timestamp').values_list('child_id', 'latitude', 'longitude', 'timestamp'):
+        fixes.setdefault(child_id, []).append((lat, lon, ts))
+    for child_id, rows in fixes.items():
+        ctx = contexts[child_id]
+        ctx.fix_datetimes = [ts for _, _, ts in rows]
+        ctx.lats = np.array([lat for lat, _, _ in rows])
+        ctx.lons = np.array([lon for _, lon, _ in rows])
+        ctx.fix_times = np.array([ts.timestamp() for ts in ctx.fix_datetimes])
+        ctx.fix_hours = np.array([ts.hour for ts in ctx.fix_datetimes])
+
+@register_window('tracking', queries=2)
+def load_tracking(contexts, now):
+    """Latest Tracking row per child and the number of escapes in the last 30 days."""
+    ids = list(contexts)
+    for ctx in contexts.values():
+        ctx.tracking = None
+        ctx.escapes_30d = 0
+    latest = Tracking.objects.filter(child_id__in=ids).order_by().values('child_id').annotate(latest=Max('id')).values('latest')
+    for tracking in Tracking.objects.filter(id__in=latest):
+        contexts[tracking.child_id].tracking = tracking
+    for row in Tracking.objects.filter(child_id__in=ids, status='escaped', last_update__gte=now - timedelta(days=30)).order_by().values(
+            'child_id').annotate(n=Count('id')):
+        contexts[row['child_id']].escapes_30d = row['n']
+
+@register_rule('missing_location_update', group='tracking', windows=('tracking',))
+def missing_location_update(ctx):
+    tracking = ctx.tracking
+    if tracking and tracking.last_update and (ctx.now - tracking.last_update) > timedelta(hours=1):
+        return [{
+            'type': 'location',
+            'description': f"Child {ctx.child} has not updated location in over 1 hour.",
+            'severity': 'high'
+        }]
+    return []
+
+@register_rule('repeated_escapes', group='tracking', windows=('tracking',))
+def repeated_escapes(ctx):
+    if ctx.escapes_30d > 2:
+        return [{
+            'type': 'escape',
+            'description': f"Child {ctx.child} has escaped {ctx.escapes_30d} times in the last 30 days.",
+            'severity': 'high'
+        }]
+    return []
+
+@register_rule('negative_tracking_notes', group='tracking', windows=('tracking',), cost=5)
+def negative_tracking_notes(ctx):
+    # Sentiment analysis only runs if TextBlob is installed
+    tracking = ctx.tracking
+    if TextBlob is None or not tracking or not tracking.notes:
+        return []
+    if TextBlob(tracking.notes).sentiment.polarity < -0.5:
+        return [{
+            'type': 'note',
+            'description': f"Negative sentiment in notes for {ctx.child}: '{tracking.notes[:30]}...'",
+            'severity': 'medium'
+        }]
+    return []
+
+@register_rule('rapid_movement', group='tracking', windows=('fixes',), cost=2)
+def rapid_movement(ctx):
+    """Distance > 5km in < 10min between consecutive fixes of the last hour; reports the largest jump."""
+    recent = ctx.fix_times >= ctx.now.timestamp() - 3600
+    if np.count_nonzero(recent) < 2:
+        return []
+    lats, lons, times = ctx.lats[recent], ctx.lons[recent], ctx.fix_times[recent]
+    distances = haversine_m(lats[:-1], lons[:-1], lats[1:], lons[1:]) / 1000  # km
+    flagged = (distances > 5) & (np.diff(times) < 600)
+    if not flagged.any():
+        return []
+    return [{
+        'type': 'location',
+        'description': f"Child {ctx.child} moved {distances[flagged].max():.1f}km in less than 10 minutes.",
+        'severity': 'high'
+    }]
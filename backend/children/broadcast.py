@@ -0,0 +1,158 @@
+import json
+import threading
+from collections import deque
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from .roster import roster_rows
+
+# Dashboard socket protocol, version 1. Server messages:
+#   {"type": "snapshot", "v": 1, "seq": N, "children": [full rows]}
+#   {"type": "patch", "v": 1, "seq": N, "changes": [{"id": ..., <changed fields>}, ...]}
+# Every flush bumps seq by one. Patches carry only fields that changed since the previous
+# flush, so clients apply them in seq order on top of a snapshot.
+PROTOCOL_VERSION = 1
+
+class DashboardBroadcaster:
+    """Coalesces dashboard updates and pushes per-child patches to the 'dashboard' group.
+
+    Saves only mark children dirty; a timer flushes the dirty set at most once per
+    interval_ms, so a burst of fixes for the same children costs one roster query.
+    With interval_ms=0 every mark flushes immediately. The last history_size patches
+    are kept so reconnecting clients can catch up without a full snapshot.
+
+    State is per process, like the InMemoryChannelLayer it publishes to.
+    """
+
+    def __init__(self, interval_ms, history_size):
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._dirty = set()
+        self._timer = None
+        self._seq = 0
+        self._history = deque(maxlen=history_size)
+        self._last_sent = {}
+        # Roster size at the last snapshot, for the bytes_saved estimate
+        self._roster_size = 0
+        self._stats = {
+            'updates_received': 0,
+            'updates_coalesced': 0,
+            'flushes': 0,
+            'children_sent': 0,
+            'bytes_sent': 0,
+            'bytes_saved': 0,
+        }
+
+    def mark_dirty(self, child_ids):
+        flush_now = False
+        with self._lock:
+            self._stats['updates_received'] += len(child_ids)
+            if self._timer is not None:
+                # A flush is already scheduled; these updates ride along with it
+                self._stats['updates_coalesced'] += len(child_ids)
+            self._dirty.update(child_ids)
+            if self.interval_ms <= 0:
+                flush_now = True
+            elif self._timer is None:
+                self._timer = threading.Timer(self.interval_ms / 1000, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        """Send pending patches now. Batch jobs call this before exiting."""
+        # Held across the send so clients see patches in seq order
+        with self._send_lock:
+            with self._lock:
+                child_ids = self._dirty
+                self._dirty = set()
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not child_ids:
+                return
+            rows = roster_rows(child_ids)
+            with self._lock:
+                patches = []
+                for row in rows:
+                    previous = self._last_sent.get(row['id'])
+                    patch = {k: v for k, v in row.items() if previous is None or previous.get(k) != v}
+                    self._last_sent[row['id']] = row
+                    if patch:
+                        patch['id'] = row['id']
+                        patches.append(patch)
+                if not patches:
+                    return
+                self._seq += 1
+                seq = self._seq
+                self._history.append((seq, patches))
+            data = {'type': 'patch', 'v': PROTOCOL_VERSION, 'seq': seq, 'changes': patches}
+            sent = len(json.dumps(data, cls=DjangoJSONEncoder))
+            with self._lock:
+                # Estimate what a full-roster push would have cost from the size of these rows
+                roster_size = max(self._roster_size, len(self._last_sent))
+                full = len(json.dumps(rows, cls=DjangoJSONEncoder)) * roster_size // len(rows)
+                self._stats['flushes'] += 1
+                self._stats['children_sent'] += len(patches)
+                self._stats['bytes_sent'] += sent
+                self._stats['bytes_saved'] += max(full - sent, 0)
+            async_to_sync(get_channel_layer().group_send)(
+                'dashboard',
+                {'type': 'dashboard_update', 'data': data}
+            )
+
+    def snapshot(self):
+        """Full roster message labelled with the current seq."""
+        with self._send_lock:
+            with self._lock:
+                seq = self._seq
+                # The snapshot may already contain changes that are still pending; forgetting
+                # what was sent makes the next patch for any child carry its full row.
+                self._last_sent.clear()
+            children = roster_rows()
+            with self._lock:
+                self._roster_size = len(children)
+            return {'type': 'snapshot', 'v': PROTOCOL_VERSION, 'seq': seq, 'children': children}
+
+    def broadcast_snapshot(self):
+        async_to_sync(get_channel_layer().group_send)(
+            'dashboard',
+            {'type': 'dashboard_update', 'data': self.snapshot()}
+        )
+
+    def changes_since(self, since):
+        """A single merged patch message covering everything after `since`.
+
+        Returns None when `since` is older than the retained history (or from a
+        previous server run), in which case the client needs a snapshot.
+        """
+        with self._lock:
+            if since > self._seq:
+                return None
+            if self._history and since < self._history[0][0] - 1:
+                return None
+            if not self._history and since < self._seq:
+                return None
+            merged = {}
+            for seq, patches in self._history:
+                if seq <= since:
+                    continue
+                for patch in patches:
+                    merged.setdefault(patch['id'], {}).update(patch)
+            return {'type': 'patch', 'v': PROTOCOL_VERSION, 'seq': self._seq, 'changes': list(merged.values())}
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, pending=len(self._dirty), seq=self._seq)
+
+dashboard_broadcaster = DashboardBroadcaster(settings.DASHBOARD_BROADCAST_INTERVAL_MS, settings.DASHBOARD_PATCH_HISTORY)
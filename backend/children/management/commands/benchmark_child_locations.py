@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from children.models import Child, ChildAIProfile, Tracking
+from children.views import dashboard_child_locations
+from core.models import User
+from datetime import date
+from rest_framework.test import APIRequestFactory, force_authenticate
+import random
+import time
+
+class Command(BaseCommand):
+    help = 'Measure latency and query count of the dashboard child-locations endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Create this many synthetic children first (rolled back afterwards).')
+        parser.add_argument('--requests', type=int, default=50, help='Number of requests to time.')
+        parser.add_argument('--limit', type=int, default=5000, help='Page size to request.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed']:
+                self._seed(options['seed'])
+            total = Child.objects.count()
+            admin = User.objects.filter(is_staff=True).first()
+            if admin is None:
+                raise CommandError('An is_staff user is required to call the endpoint.')
+            factory = APIRequestFactory()
+            timings = []
+            for _ in range(options['requests']):
+                request = factory.get('/children/dashboard/child-locations/', {'limit': options['limit']})
+                force_authenticate(request, user=admin)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = dashboard_child_locations(request)
+                    response.render()
+                    timings.append((time.perf_counter() - started) * 1000)
+            transaction.set_rollback(True)
+
+        timings.sort()
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(f"Children: {total}  Rows returned: {len(response.data['results'])}")
+        self.stdout.write(f"Queries per request: {len(queries)}")
+        self.stdout.write(f"p50 {timings[len(timings) // 2]:.1f} ms  p95 {p95:.1f} ms")
+
+    def _seed(self, count):
+        now = timezone.now()
+        tag = random.randint(0, 10**6)
+        children = Child.objects.bulk_create([
+            Child(first_name='Bench', last_name=str(i), date_of_birth=date(2012, 1, 1), gender='female',
+                  unique_identifier=f"B{tag}-{i}")
+            for i in range(count)
+        ])
+        Tracking.objects.bulk_create([
+            Tracking(child=child, last_seen=now, last_known_location=f"{random.uniform(-2, -1.9)},{random.uniform(30, 30.1)}",
+                     status=random.choice(['in_center', 'off_premises', 'escaped']))
+            for child in children
+        ])
+        ChildAIProfile.objects.bulk_create([
+            ChildAIProfile(child=child, escape_risk_score=random.random()) for child in children
+        ])
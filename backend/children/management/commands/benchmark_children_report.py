@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from children.models import Child, ParentGuardian, AcademicRecord, BudgetRecord
+from children.reports import REPORT_QUERIES, build_children_report, report_queryset
+from children.serializers import ChildSerializer, ParentGuardianSerializer, AcademicRecordSerializer, BudgetRecordSerializer
+from core.models import User
+import time
+
+class Command(BaseCommand):
+    help = 'Benchmark the printable children report on synthetic children (rolled back) and check its query count.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 2000], help='Numbers of synthetic children.')
+        parser.add_argument('--parents', type=int, default=2, help='Parents per child.')
+        parser.add_argument('--academic', type=int, default=3, help='Academic records per child.')
+        parser.add_argument('--budget', type=int, default=5, help='Budget records per child.')
+        parser.add_argument('--naive', action='store_true', help='Also time the old per-child query loop.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'children':>10} {'queries':>8} {'ms':>10} {'naive queries':>14} {'naive ms':>10}")
+        for size in options['sizes']:
+            with transaction.atomic():
+                admin = User.objects.create(username='report-benchmark', user_type='admin')
+                self._populate(size, options)
+                context = {'request': SimpleNamespace(user=admin)}
+                # Only the synthetic roster, so existing children do not skew the row check
+                roster = report_queryset().filter(unique_identifier__startswith='RPT-')
+                queries, seconds, report = self._measure(lambda: build_children_report(context, roster))
+                naive_queries, naive_seconds = '-', None
+                if options['naive']:
+                    naive_queries, naive_seconds, _ = self._measure(lambda: self._naive_report(context))
+                transaction.set_rollback(True)
+            naive_ms = f'{naive_seconds * 1000:.1f}' if naive_seconds is not None else '-'
+            self.stdout.write(f"{size:>10} {queries:>8} {seconds * 1000:>10.1f} {naive_queries:>14} {naive_ms:>10}")
+            if queries != REPORT_QUERIES:
+                raise CommandError(f'Report ran {queries} queries for {size} children, expected {REPORT_QUERIES}.')
+            if len(report) != size or any(len(row['budget_records']) != options['budget'] for row in report):
+                raise CommandError('Report rows do not match the synthetic data.')
+        self.stdout.write(self.style.SUCCESS(f'Report query count is constant ({REPORT_QUERIES}).'))
+
+    def _measure(self, fn):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - started
+        return len(captured.captured_queries), seconds, result
+
+    def _populate(self, size, options):
+        children = Child.objects.bulk_create([
+            Child(first_name=f'Child{i}', last_name='Benchmark', date_of_birth=date(2012, 1, 1),
+                  gender='female' if i % 2 else 'male', unique_identifier=f'RPT-{i:07d}')
+            for i in range(size)
+        ])
+        parents = ParentGuardian.objects.bulk_create([
+            ParentGuardian(first_name=f'Parent{i}', last_name='Benchmark', relationship_type='guardian')
+            for i in range(size * options['parents'])
+        ])
+        ParentGuardian.children.through.objects.bulk_create([
+            ParentGuardian.children.through(parentguardian_id=parent.id, child_id=children[i // options['parents']].id)
+            for i, parent in enumerate(parents)
+        ])
+        AcademicRecord.objects.bulk_create([
+            AcademicRecord(child=child, academic_year=str(2020 + y), academic_level='P5', school_name='Benchmark School',
+                           performance='Good', attendance='95%')
+            for child in children for y in range(options['academic'])
+        ])
+        BudgetRecord.objects.bulk_create([
+            BudgetRecord(child=child, record_type='food', record_date=date(2024, 1, 1) + timedelta(days=r), amount=10, description='Benchmark')
+            for child in children for r in range(options['budget'])
+        ])
+
+    def _naive_report(self, context):
+        # The per-child loop the report used before prefetching
+        children = Child.objects.filter(unique_identifier__startswith='RPT-').order_by('id')
+        report = ChildSerializer(children, many=True, context=context).data
+        for child in report:
+            child['parents'] = ParentGuardianSerializer(ParentGuardian.objects.filter(children=child['id']), many=True, context=context).data
+            child['academic_records'] = AcademicRecordSerializer(AcademicRecord.objects.filter(child_id=child['id']), many=True, context=context).data
+            child['budget_records'] = BudgetRecordSerializer(BudgetRecord.objects.filter(child_id=child['id']), many=True, context=context).data
+        return report
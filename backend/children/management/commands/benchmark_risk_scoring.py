@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from children.models import Child, LocationFix, Tracking
+from children.risk import child_escape_risk, predict_escape_risk
+from datetime import date, timedelta
+import random
+import time
+
+class Command(BaseCommand):
+    help = 'Report batch escape-risk scoring throughput (children/sec) at several cohort sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000, 50000], help='Cohort sizes to score.')
+        parser.add_argument('--compare', type=int, default=200, help='Also time the per-child path on this many children (0 to skip).')
+        parser.add_argument('--fixes', type=int, default=20, help='LocationFix rows per synthetic child.')
+
+    def handle(self, *args, **options):
+        # Synthetic children and everything scored are rolled back
+        with transaction.atomic():
+            missing = max(options['sizes']) - Child.objects.count()
+            if missing > 0:
+                self.stdout.write(f"Seeding {missing} synthetic children...")
+                self._seed(missing, options['fixes'])
+
+            if options['compare']:
+                sample = list(Child.objects.order_by('id').values_list('id', flat=True)[:options['compare']])
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    for child_id in sample:
+                        child_escape_risk(child_id)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"per-child  n={len(sample):>6}  {len(sample) / elapsed:>10,.0f} children/sec  {len(queries)} queries")
+
+            for size in options['sizes']:
+                cohort = Child.objects.filter(id__in=Child.objects.order_by('id').values('id')[:size])
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    child_ids, _ = predict_escape_risk(cohort)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"batch      n={len(child_ids):>6}  {len(child_ids) / elapsed:>10,.0f} children/sec  {len(queries)} queries")
+            transaction.set_rollback(True)
+
+    def _seed(self, count, fixes_per_child):
+        now = timezone.now()
+        tag = random.randint(0, 10**6)
+        children = Child.objects.bulk_create([
+            Child(first_name='Bench', last_name=str(i), date_of_birth=date(2012, 1, 1), gender='female',
+                  unique_identifier=f"R{tag}-{i}")
+            for i in range(count)
+        ], batch_size=1000)
+        Tracking.objects.bulk_create([
+            Tracking(child=child, last_seen=now - timedelta(hours=random.uniform(0, 48)),
+                     status=random.choice(['in_center', 'in_center', 'off_premises', 'escaped']))
+            for child in children
+        ], batch_size=1000)
+        LocationFix.objects.bulk_create([
+            LocationFix(child=child, timestamp=now - timedelta(minutes=30 * n),
+                        latitude=-1.95 + random.uniform(-0.05, 0.05), longitude=30.06 + random.uniform(-0.05, 0.05))
+            for child in children for n in range(fixes_per_child)
+        ], batch_size=5000)
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from children.models import WearableDevice
+from children.views import wearable_location_update, wearable_location_bulk_update
+from core.models import CenterConfig
+from datetime import timedelta
+from rest_framework.test import APIRequestFactory
+import json
+import random
+import time
+import urllib.request
+
+class Command(BaseCommand):
+    help = 'Load-test wearable ingestion and report fixes/sec for the single-fix and bulk endpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixes', type=int, default=2000, help='Number of fixes to send per endpoint.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Fixes per bulk request.')
+        parser.add_argument(
+            '--base-url',
+            help='Send requests over HTTP to a running server (e.g. http://127.0.0.1:8000). '
+                 'Without it the views are called in-process and all writes are rolled back.',
+        )
+
+    def handle(self, *args, **options):
+        device_ids = list(WearableDevice.objects.filter(is_active=True).values_list('device_id', flat=True))
+        if not device_ids:
+            raise CommandError('No active wearable devices to send fixes for.')
+        fixes = self._generate_fixes(device_ids, options['fixes'])
+        batch_size = options['batch_size']
+
+        if options['base_url']:
+            base_url = options['base_url'].rstrip('/')
+            single = self._run(fixes, 1, lambda batch: self._post_http(f"{base_url}/children/wearable/location-update/", batch[0]))
+            bulk = self._run(fixes, batch_size, lambda batch: self._post_http(f"{base_url}/children/wearable/location-bulk-update/", {'fixes': batch}))
+        else:
+            factory = APIRequestFactory()
+            single = self._run_in_rollback(fixes, 1, lambda batch: wearable_location_update(
+                factory.post('/children/wearable/location-update/', batch[0], format='json')))
+            bulk = self._run_in_rollback(fixes, batch_size, lambda batch: wearable_location_bulk_update(
+                factory.post('/children/wearable/location-bulk-update/', {'fixes': batch}, format='json')))
+
+        self.stdout.write(f"Devices: {len(device_ids)}  Fixes: {len(fixes)}  Batch size: {batch_size}")
+        self.stdout.write(f"Single-fix endpoint: {single:,.0f} fixes/sec")
+        self.stdout.write(f"Bulk endpoint:       {bulk:,.0f} fixes/sec")
+        if single:
+            self.stdout.write(self.style.SUCCESS(f"Speedup: {bulk / single:.1f}x"))
+
+    def _generate_fixes(self, device_ids, count):
+        # Stay inside the safe zone so the run does not raise escape alerts
+        center = CenterConfig.objects.first()
+        lat, lon = (center.latitude, center.longitude) if center else (0.0, 0.0)
+        start = timezone.now() - timedelta(seconds=count)
+        return [
+            {
+                'device_id': random.choice(device_ids),
+                'lat': lat + random.uniform(-0.0002, 0.0002),
+                'lon': lon + random.uniform(-0.0002, 0.0002),
+                'timestamp': (start + timedelta(seconds=i)).isoformat(),
+            }
+            for i in range(count)
+        ]
+
+    def _run(self, fixes, batch_size, send):
+        started = time.perf_counter()
+        for i in range(0, len(fixes), batch_size):
+            send(fixes[i:i + batch_size])
+        elapsed = time.perf_counter() - started
+        return len(fixes) / elapsed if elapsed > 0 else 0
+
+    def _run_in_rollback(self, fixes, batch_size, send):
+        with transaction.atomic():
+            rate = self._run(fixes, batch_size, send)
+            transaction.set_rollback(True)
+        return rate
+
+    def _post_http(self, url, payload):
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        with urllib.request.urlopen(request) as response:
+            response.read()
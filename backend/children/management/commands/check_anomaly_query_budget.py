@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from children.models import Child
+from ai.rules import RuleExecutor
+import children.anomaly_rules  # noqa: F401  registers the 'tracking' rules
+
+class Command(BaseCommand):
+    help = 'Fail if the tracking anomaly rules issue more queries than their fixed per-cohort budget.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=50, help='Number of children to evaluate.')
+
+    def handle(self, *args, **options):
+        executor = RuleExecutor('tracking')
+        sample = list(Child.objects.order_by('id')[:options['sample']])
+        if not sample:
+            raise CommandError('No children to evaluate.')
+
+        budget = executor.query_budget
+        counts = {}
+        for label, cohort in (('1 child', sample[:1]), (f'{len(sample)} children', sample)):
+            with CaptureQueriesContext(connection) as queries:
+                executor.run(cohort)
+            counts[label] = len(queries)
+            self.stdout.write(f"{label}: {len(queries)} queries (budget {budget}, windows {', '.join(executor.windows)})")
+
+        if any(count > budget for count in counts.values()):
+            raise CommandError('Anomaly detection exceeded its query budget.')
+        if len(set(counts.values())) > 1:
+            raise CommandError('Query count grows with cohort size.')
+        self.stdout.write(self.style.SUCCESS('Query budget respected.'))
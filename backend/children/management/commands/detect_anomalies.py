@@ -1,58 +1,91 @@
-from django.core.management.base import BaseCommand
-from children.models import Child, Tracking
-from core.models import Notification, User
-from django.utils import timezone
-from datetime import timedelta
-from math import radians, cos, sin, asin, sqrt
-try:
-    from textblob import TextBlob
-except ImportError:
-    TextBlob = None
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.models import F
+from children.models import Child
+from core.models import User
+from core.outbox import notify_bulk
+from ai.rules import RuleExecutor
+import children.anomaly_rules  # noqa: F401  registers the 'tracking' rules
+from multiprocessing import Pool
+import django
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def _init_worker():
+    """Give each pool process its own Django setup and database connections."""
+    django.setup()
+    connections.close_all()
+
+def _evaluate_chunk(child_ids):
+    """Run the tracking rules for one chunk. Returns (descriptions, stats, error); runs in a worker or inline."""
+    executor = RuleExecutor('tracking')
+    try:
+        chunk = list(Child.objects.filter(id__in=child_ids).order_by('id'))
+        results = executor.run(chunk)
+    except Exception as e:
+        logger.exception(f"Error detecting anomalies for children {child_ids[0]}-{child_ids[-1]}")
+        return [], executor.stats, str(e) or e.__class__.__name__
+    finally:
+        close_old_connections()
+    return [anomaly['description'] for child in chunk for anomaly in results[child.id]], executor.stats, None
+
+def _parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise CommandError('--shard must look like i/N, e.g. 0/4')
+    if count < 1 or not 0 <= index < count:
+        raise CommandError('--shard index must be between 0 and N-1')
+    return index, count
 
 class Command(BaseCommand):
     help = 'Detect anomalies in child tracking and notify admins.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Children evaluated per batch of window queries.')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes, each with its own database connection.')
+        parser.add_argument('--shard', help='Only process shard i of N (children with id %% N == i), e.g. 0/4 on the first of four hosts.')
+
     def handle(self, *args, **options):
-        now = timezone.now()
+        shard = _parse_shard(options['shard']) if options['shard'] else None
+        started = time.perf_counter()
+        cohort = Child.objects.all()
+        if shard:
+            index, count = shard
+            cohort = cohort.annotate(shard=F('id') % count).filter(shard=index)
+        child_ids = list(cohort.order_by('id').values_list('id', flat=True))
+        chunk_size = max(options['chunk_size'], 1)
+        chunks = [child_ids[i:i + chunk_size] for i in range(0, len(child_ids), chunk_size)]
+        workers = max(options['workers'], 1)
+        if workers > 1 and len(chunks) > 1:
+            # Do not hand the parent's open connections to forked workers
+            connections.close_all()
+            with Pool(processes=workers, initializer=_init_worker) as pool:
+                outputs = list(pool.imap_unordered(_evaluate_chunk, chunks))
+        else:
+            outputs = [_evaluate_chunk(chunk) for chunk in chunks]
+
+        summary = RuleExecutor('tracking')
         anomalies = []
-        # Example 1: Missing location updates (no update in 1 hour)
-        for tracking in Tracking.objects.all():
-            if tracking.last_update and (now - tracking.last_update) > timedelta(hours=1):
-                anomalies.append(f"Child {tracking.child} has not updated location in over 1 hour.")
-        # Example 2: Repeated escapes (more than 2 escapes in last 30 days)
-        for child in Child.objects.all():
-            escapes = Tracking.objects.filter(child=child, status='escaped', last_update__gte=now-timedelta(days=30)).count()
-            if escapes > 2:
-                anomalies.append(f"Child {child} has escaped {escapes} times in the last 30 days.")
-        # Example 3: Rapid movement (distance > 5km in <10min)
-        for child in Child.objects.all():
-            records = Tracking.objects.filter(child=child).order_by('-last_update')[:2]
-            if len(records) == 2:
-                loc1 = records[0].last_known_location
-                loc2 = records[1].last_known_location
-                t1 = records[0].last_update
-                t2 = records[1].last_update
-                if loc1 and loc2:
-                    lat1, lon1 = map(float, loc1.split(','))
-                    lat2, lon2 = map(float, loc2.split(','))
-                    R = 6371  # km
-                    dlat = radians(lat2 - lat1)
-                    dlon = radians(lon2 - lon1)
-                    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-                    c = 2 * asin(sqrt(a))
-                    distance = R * c
-                    if distance > 5 and abs((t1-t2).total_seconds()) < 600:
-                        anomalies.append(f"Child {child} moved {distance:.1f}km in less than 10 minutes.")
-        # Example 4: Sentiment analysis on notes (if TextBlob is installed)
-        if TextBlob:
-            for tracking in Tracking.objects.all():
-                if tracking.notes:
-                    sentiment = TextBlob(tracking.notes).sentiment.polarity
-                    if sentiment < -0.5:
-                        anomalies.append(f"Negative sentiment in notes for {tracking.child}: '{tracking.notes[:30]}...'")
-        # Notify admins
-        admins = User.objects.filter(user_type='admin')
-        for anomaly in anomalies:
-            for admin in admins:
-                Notification.objects.create(user=admin, message=f"Anomaly detected: {anomaly}")
-        self.stdout.write(self.style.SUCCESS(f"Detected and notified {len(anomalies)} anomalies.")) 
\ No newline at end of file
+        failed = []
+        for descriptions, stats, error in outputs:
+            summary.merge_stats(stats)
+            anomalies.extend(descriptions)
+            if error is not None:
+                failed.append(error)
+
+        # Every anomaly x admin notification in one bulk write, in-app only as before
+        admins = list(User.objects.filter(user_type='admin').only('id', 'email', 'profile_notify_email', 'profile_notify_push'))
+        delivered = notify_bulk([(admin, f"Anomaly detected: {anomaly}") for anomaly in anomalies for admin in admins])
+        self.stdout.write(self.style.SUCCESS(
+            f"Detected and notified {len(anomalies)} anomalies for {len(child_ids)} children with {workers} worker(s) "
+            f"in {time.perf_counter() - started:.1f}s ({delivered['in_app']} in-app, {delivered['email']} email, {delivered['push']} push)."
+        ))
+        for name, stats in summary.report():
+            self.stdout.write(
+                f"  {name:<28} {stats['seconds']:>8.3f}s  {stats['queries']:>4} queries  hit rate {stats['hit_rate']:.0%}"
+            )
+        if failed:
+            raise CommandError(f"{len(failed)} of {len(chunks)} chunks failed; first error: {failed[0]}")
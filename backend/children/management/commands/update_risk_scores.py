@@ -1,21 +1,35 @@
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+from children.broadcast import dashboard_broadcaster
 from children.models import Child, ChildAIProfile
-import random
-# Uncomment and use if you have a real model
-# import joblib
-# model = joblib.load('path/to/your/model.pkl')
+from children.risk import predict_escape_risk
 
 class Command(BaseCommand):
     help = 'Update escape risk scores for all children using an AI model.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Children scored per predict_proba call.')
+
     def handle(self, *args, **options):
-        for child in Child.objects.all():
-            profile, created = ChildAIProfile.objects.get_or_create(child=child)
-            # --- AI Model Integration Example ---
-            # features = [child.age, child.gender, ...]  # Extract real features
-            # risk_score = float(model.predict_proba([features])[0][1])
-            # profile.escape_risk_score = risk_score
-            # --- Placeholder: Remove when real model is ready ---
-            profile.escape_risk_score = random.uniform(0, 1)
-            profile.save()
-        self.stdout.write(self.style.SUCCESS('Updated risk scores for all children.')) 
\ No newline at end of file
+        missing = Child.objects.filter(ai_profile__isnull=True).values_list('id', flat=True)
+        ChildAIProfile.objects.bulk_create([ChildAIProfile(child_id=child_id) for child_id in missing], ignore_conflicts=True)
+
+        child_ids = list(Child.objects.order_by('id').values_list('id', flat=True))
+        batch_size = max(options['batch_size'], 1)
+        updated = 0
+        for start in range(0, len(child_ids), batch_size):
+            ids, probabilities = predict_escape_risk(Child.objects.filter(id__in=child_ids[start:start + batch_size]))
+            scores = dict(zip(ids, probabilities))
+            now = timezone.now()
+            profiles = list(ChildAIProfile.objects.filter(child_id__in=ids).only('id', 'child_id'))
+            for profile in profiles:
+                profile.escape_risk_score = float(scores[profile.child_id])
+                # bulk_update bypasses auto_now, and the roster ETag keys on last_evaluated
+                profile.last_evaluated = now
+            ChildAIProfile.objects.bulk_update(profiles, ['escape_risk_score', 'last_evaluated'], batch_size=1000)
+            updated += len(profiles)
+
+        # bulk_update skips post_save, so the dashboard gets one coalesced patch for the run
+        dashboard_broadcaster.mark_dirty(child_ids)
+        dashboard_broadcaster.flush()
+        self.stdout.write(self.style.SUCCESS(f'Updated risk scores for {updated} children.'))
@@ -0,0 +1,60 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_location_fixes(apps, schema_editor):
+    Tracking = apps.get_model('children', 'Tracking')
+    LocationFix = apps.get_model('children', 'LocationFix')
+    batch = []
+    for tracking in Tracking.objects.exclude(last_known_location__isnull=True).exclude(last_known_location='').iterator(chunk_size=2000):
+        try:
+            lat, lon = map(float, tracking.last_known_location.split(','))
+        except ValueError:
+            continue
+        batch.append(LocationFix(
+            child_id=tracking.child_id,
+            timestamp=tracking.last_update or tracking.last_seen,
+            latitude=lat,
+            longitude=lon,
+        ))
+        if len(batch) >= 2000:
+            LocationFix.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    LocationFix.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0003_wearabledevice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationFix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('accuracy_m', models.FloatField(blank=True, null=True)),
+                ('battery_level', models.FloatField(blank=True, null=True)),
+                ('signal_strength', models.FloatField(blank=True, null=True)),
+                ('child', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_fixes', to='children.child')),
+                ('device', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='location_fixes', to='children.wearabledevice')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='locationfix',
+            constraint=models.UniqueConstraint(fields=('child', 'timestamp'), name='unique_child_fix_timestamp'),
+        ),
+        migrations.AddIndex(
+            model_name='locationfix',
+            index=models.Index(fields=['timestamp'], name='locationfix_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='locationfix',
+            index=models.Index(fields=['device', 'timestamp'], name='locationfix_device_ts_idx'),
+        ),
+        migrations.RunPython(backfill_location_fixes, migrations.RunPython.noop),
+    ]
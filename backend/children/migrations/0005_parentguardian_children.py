@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0004_locationfix'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parentguardian',
+            name='children',
+            field=models.ManyToManyField(blank=True, related_name='parents', to='children.child'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_centerconfig'),
+        ('children', '0005_parentguardian_children'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='child',
+            name='center',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='core.centerconfig'),
+        ),
+    ]
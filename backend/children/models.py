@@ -1,9 +1,7 @@
-from django.db import models
+import numpy as np
+from django.db import models, transaction
 from django.conf import settings
 from core.models import BaseModel, CenterConfig
-from math import radians, cos, sin, asin, sqrt
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -26,6 +24,8 @@ class Child(BaseModel):
     unique_identifier = models.CharField(max_length=20, unique=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     notes = models.TextField(blank=True)
+    # Optional; drives the per-center dashboard breakdown
+    center = models.ForeignKey(CenterConfig, on_delete=models.SET_NULL, null=True, blank=True, related_name='children')
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -65,6 +65,7 @@ class ParentGuardian(BaseModel):
     address = models.TextField(blank=True)
     occupation = models.CharField(max_length=100, blank=True)
     notes = models.TextField(blank=True)
+    children = models.ManyToManyField(Child, related_name='parents', blank=True)
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.relationship_type}"
 
@@ -135,22 +136,12 @@ class Tracking(BaseModel):
 
     def is_outside_safe_zone(self, safe_zone=None):
         # Use CenterConfig for geofence
-        try:
-            center = safe_zone or CenterConfig.objects.first()
-            if not center or not self.last_known_location:
-                return False
-            lat1, lon1 = map(float, self.last_known_location.split(','))
-            lat2, lon2 = center.latitude, center.longitude
-            # Haversine formula
-            R = 6371000  # Earth radius in meters
-            dlat = radians(lat2 - lat1)
-            dlon = radians(lon2 - lon1)
-            a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-            c = 2 * asin(sqrt(a))
-            distance = R * c
-            return distance > center.safe_radius_m
-        except Exception:
+        from core.geofence import get_safe_zones, is_outside, parse_location, zones_for
+        coords = parse_location(self.last_known_location)
+        if not coords:
             return False
+        zones = zones_for([safe_zone]) if safe_zone else get_safe_zones()
+        return is_outside(coords[0], coords[1], zones)
 
     def __str__(self):
         return f"{self.child} - {self.status} - {self.last_seen}"
@@ -161,10 +152,9 @@ class ChildAIProfile(models.Model):
     last_evaluated = models.DateTimeField(auto_now=True)
 
     def update_risk_score(self):
-        # Placeholder: implement AI logic here
-        # For now, assign a random risk score
-        import random
-        self.escape_risk_score = random.uniform(0, 1)
+        # Same inference path as the update_risk_scores command, for a single child
+        from .risk import child_escape_risk
+        self.escape_risk_score = child_escape_risk(self.child_id)
         self.save()
 
     def __str__(self):
@@ -180,31 +170,58 @@ class WearableDevice(models.Model):
     def __str__(self):
         return f"{self.device_id} for {self.child}"
 
+class LocationFixQuerySet(models.QuerySet):
+    def window(self, child_id, since):
+        """Fixes for one child since a point in time, served by the (child, timestamp) index."""
+        return self.filter(child_id=child_id, timestamp__gte=since).order_by('timestamp')
+
+    def trajectory(self, child_id, since):
+        """(lats, lons, timestamps) NumPy arrays for one child; timestamps are POSIX seconds."""
+        rows = list(self.window(child_id, since).values_list('latitude', 'longitude', 'timestamp'))
+        if not rows:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        lats, lons, times = zip(*rows)
+        return np.array(lats), np.array(lons), np.array([t.timestamp() for t in times])
+
+class LocationFix(models.Model):
+    """Append-only history of wearable location fixes; Tracking keeps only the latest position."""
+    child = models.ForeignKey(Child, on_delete=models.CASCADE, related_name='location_fixes')
+    device = models.ForeignKey(WearableDevice, on_delete=models.SET_NULL, null=True, blank=True, related_name='location_fixes')
+    timestamp = models.DateTimeField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    accuracy_m = models.FloatField(null=True, blank=True)
+    battery_level = models.FloatField(null=True, blank=True)
+    signal_strength = models.FloatField(null=True, blank=True)
+
+    objects = LocationFixQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['child', 'timestamp'], name='unique_child_fix_timestamp'),
+        ]
+        indexes = [
+            models.Index(fields=['timestamp'], name='locationfix_timestamp_idx'),
+            models.Index(fields=['device', 'timestamp'], name='locationfix_device_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.child} @ {self.timestamp}: {self.latitude},{self.longitude}"
+
 def broadcast_dashboard_update():
-    from .models import Child, Tracking, ChildAIProfile
-    children = Child.objects.all()
-    data = []
-    for child in children:
-        tracking = child.tracking_records.last() if hasattr(child, 'tracking_records') else None
-        ai_profile = getattr(child, 'ai_profile', None)
-        data.append({
-            'id': child.id,
-            'name': f"{child.first_name} {child.last_name}",
-            'status': tracking.status if tracking else None,
-            'last_known_location': tracking.last_known_location if tracking else None,
-            'last_update': tracking.last_update if tracking else None,
-            'risk_score': ai_profile.escape_risk_score if ai_profile else None,
-        })
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        'dashboard',
-        {'type': 'dashboard_update', 'data': {'children': data}}
-    )
+    """Push a full roster snapshot to the 'dashboard' group. Routine saves send patches via children.broadcast."""
+    from .broadcast import dashboard_broadcaster
+    dashboard_broadcaster.broadcast_snapshot()
+
+def _mark_dirty_on_commit(child_id):
+    # A flush reads the roster on its own connection, so wait until the row is committed
+    from .broadcast import dashboard_broadcaster
+    transaction.on_commit(lambda: dashboard_broadcaster.mark_dirty([child_id]))
 
 @receiver(post_save, sender=Tracking)
 def tracking_post_save(sender, instance, **kwargs):
-    broadcast_dashboard_update()
+    _mark_dirty_on_commit(instance.child_id)
 
 @receiver(post_save, sender=ChildAIProfile)
 def ai_profile_post_save(sender, instance, **kwargs):
-    broadcast_dashboard_update() 
\ No newline at end of file
+    _mark_dirty_on_commit(instance.child_id)
@@ -0,0 +1,92 @@
+import numpy as np
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, Max, Q, StdDev
+from django.utils import timezone
+from ai.model_registry import model_registry
+from .models import Child, LocationFix, Tracking
+
+# Escape-risk inference for ChildAIProfile.escape_risk_score. Features are built for a
+# whole cohort with one grouped query per source and scored with one predict_proba call.
+
+# Column order of the feature matrix
+FEATURE_NAMES = [
+    'age_years', 'days_in_care', 'escapes_90d', 'off_premises_30d',
+    'hours_since_seen', 'fixes_7d', 'night_fixes_7d', 'location_spread_km',
+]
+
+class BaselineEscapeRiskModel:
+    """Hand-set logistic model used until a trained artifact exists at ESCAPE_RISK_MODEL_PATH.
+
+    Escape history dominates; off-premises visits, night movement, roaming range and
+    time since last contact add to it. Inputs are capped so one outlier cannot saturate.
+    """
+    intercept = -2.5
+    weights = np.array([0.0, 0.0, 1.0, 0.25, 0.02, 0.0, 0.05, 0.5])
+    caps = np.array([np.inf, np.inf, 5, 10, 72, np.inf, 40, 5])
+
+    def predict_proba(self, X):
+        z = self.intercept + np.minimum(np.asarray(X, dtype=float), self.caps) @ self.weights
+        p = 1 / (1 + np.exp(-z))
+        return np.column_stack([1 - p, p])
+
+def build_feature_matrix(children):
+    """(child_ids, N x len(FEATURE_NAMES) matrix) for a Child queryset."""
+    now = timezone.now()
+    today = now.date()
+    cohort = children.values('id')
+
+    def grouped(queryset, **aggregates):
+        rows = queryset.filter(child__in=cohort).order_by().values('child_id').annotate(**aggregates)
+        return {row['child_id']: row for row in rows}
+
+    tracking = grouped(
+        Tracking.objects,
+        escapes=Count('id', filter=Q(status='escaped', last_update__gte=now - timedelta(days=90))),
+        off_premises=Count('id', filter=Q(status='off_premises', last_update__gte=now - timedelta(days=30))),
+        last_seen=Max('last_seen'),
+    )
+    fixes = grouped(
+        LocationFix.objects.filter(timestamp__gte=now - timedelta(days=7)),
+        n=Count('id'),
+        night=Count('id', filter=Q(timestamp__hour__gte=23) | Q(timestamp__hour__lt=5)),
+        lat_sd=StdDev('latitude'),
+        lon_sd=StdDev('longitude'),
+    )
+
+    child_ids = []
+    rows = []
+    for child in children.order_by('id').values('id', 'date_of_birth', 'enrollment__enrollment_date'):
+        child_id = child['id']
+        t = tracking.get(child_id, {})
+        f = fixes.get(child_id, {})
+        enrolled = child['enrollment__enrollment_date']
+        last_seen = t.get('last_seen')
+        # Degrees to km; longitude spread is shrunk by latitude, negligible near the equator
+        spread_km = 111.0 * float(np.hypot(f.get('lat_sd') or 0.0, f.get('lon_sd') or 0.0))
+        child_ids.append(child_id)
+        rows.append([
+            (today - child['date_of_birth']).days / 365.25,
+            (today - enrolled).days if enrolled else 0,
+            t.get('escapes', 0),
+            t.get('off_premises', 0),
+            (now - last_seen).total_seconds() / 3600 if last_seen else 72,
+            f.get('n', 0),
+            f.get('night', 0),
+            spread_km,
+        ])
+    return child_ids, np.array(rows, dtype=float).reshape(-1, len(FEATURE_NAMES))
+
+def predict_escape_risk(children):
+    """(child_ids, probabilities) for a Child queryset, with a single predict_proba call."""
+    child_ids, matrix = build_feature_matrix(children)
+    if not child_ids:
+        return child_ids, np.zeros(0)
+    model = model_registry.get(settings.ESCAPE_RISK_MODEL_PATH, BaselineEscapeRiskModel)
+    with model_registry.timed('escape_risk'):
+        probabilities = model.predict_proba(matrix)[:, 1]
+    return child_ids, probabilities
+
+def child_escape_risk(child_id):
+    _, probabilities = predict_escape_risk(Child.objects.filter(id=child_id))
+    return float(probabilities[0]) if len(probabilities) else 0.0
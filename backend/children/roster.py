@@ -0,0 +1,82 @@
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from core.geofence import parse_location
+from .models import Child, ChildAIProfile, Tracking
+
+# Dashboard roster rows built in a single query: the latest tracking row per child comes
+# from correlated subqueries and the AI profile from a LEFT JOIN. The latest Tracking row is
+# the one location source: it is what rows show, what bbox matches and what the ETag covers.
+
+RISK_BANDS = {
+    'low': (None, 0.33),
+    'medium': (0.33, 0.66),
+    'high': (0.66, None),
+}
+
+def _latest_tracking(field):
+    return Subquery(Tracking.objects.filter(child=OuterRef('pk')).order_by('-id').values(field)[:1])
+
+def roster_queryset(child_ids=None):
+    children = Child.objects.annotate(
+        tracking_status=_latest_tracking('status'),
+        tracking_location=_latest_tracking('last_known_location'),
+        tracking_update=_latest_tracking('last_update'),
+        risk_score=F('ai_profile__escape_risk_score'),
+    ).order_by('id')
+    if child_ids is not None:
+        children = children.filter(id__in=child_ids)
+    return children
+
+def filter_roster(children, statuses=None, risk_band=None):
+    """Narrow a roster queryset by latest tracking status and risk band. See roster_rows() for bbox."""
+    if statuses:
+        children = children.filter(tracking_status__in=statuses)
+    if risk_band:
+        low, high = RISK_BANDS[risk_band]
+        if low is not None:
+            children = children.filter(risk_score__gte=low)
+        if high is not None:
+            children = children.filter(risk_score__lt=high)
+    return children
+
+def _in_bbox(location, bbox):
+    point = parse_location(location)
+    if point is None:
+        return False
+    min_lat, min_lon, max_lat, max_lon = bbox
+    return min_lat <= point[0] <= max_lat and min_lon <= point[1] <= max_lon
+
+def roster_fingerprint():
+    """Cheap aggregates that change whenever any roster row could have changed."""
+    children = Child.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    tracking = Tracking.objects.aggregate(count=Count('id'), updated=Max('last_update'))
+    profiles = ChildAIProfile.objects.aggregate(count=Count('id'), updated=Max('last_evaluated'))
+    return '|'.join(str(v) for agg in (children, tracking, profiles) for v in (agg['count'], agg['updated']))
+
+def roster_rows(child_ids=None, children=None, limit=None, bbox=None):
+    """
+    Roster dicts, at most `limit`. bbox (min_lat, min_lon, max_lat, max_lon) is matched
+    against the latest tracking location, which is a free-text "lat,lon" string, so it is
+    parsed here as the rows stream in rather than in SQL.
+    """
+    if children is None:
+        children = roster_queryset(child_ids)
+    rows = children.values(
+        'id', 'first_name', 'last_name', 'tracking_status', 'tracking_location', 'tracking_update', 'risk_score'
+    )
+    if bbox:
+        rows = (row for row in rows.iterator(chunk_size=1000) if _in_bbox(row['tracking_location'], bbox))
+    elif limit is not None:
+        rows = rows[:limit]
+    result = []
+    for row in rows:
+        if limit is not None and len(result) >= limit:
+            break
+        result.append({
+            'id': row['id'],
+            'name': f"{row['first_name']} {row['last_name']}",
+            'status': row['tracking_status'],
+            'last_known_location': row['tracking_location'],
+            'last_update': row['tracking_update'],
+            'risk_score': row['risk_score'],
+        })
+    return result
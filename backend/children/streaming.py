@@ -0,0 +1,150 @@
+import logging
+import threading
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from core.geo import haversine_m
+
+logger = logging.getLogger(__name__)
+
+# Thresholds match the batch rules in ai/anomaly_detection.py
+SPEED_LIMIT_KMH = 100
+NIGHT_HOURS = (23, 5)  # [23:00, 05:00)
+NIGHT_MOVEMENT_M = 100
+
+class ChildStreamState:
+    __slots__ = ('lat', 'lon', 'ts', 'speed_kmh', 'night_flagged')
+
+    def __init__(self):
+        self.lat = None
+        self.lon = None
+        self.ts = None
+        self.speed_kmh = 0.0
+        self.night_flagged = False
+
+def _is_night(ts):
+    start, end = NIGHT_HOURS
+    hour = timezone.localtime(ts).hour
+    return hour >= start or hour < end
+
+class StreamingAnomalyDetector:
+    """Evaluates fixes as they are ingested, keeping a few rolling values per child.
+
+    Each fix costs O(1): one distance against the child's previous fix, no queries.
+    Anomalies are written straight away, so a child moving at 2am is flagged within
+    the request that delivered the fix instead of at the next detect_anomalies run.
+    Each condition fires once when it starts and re-arms when it clears.
+
+    State is per process and starts empty; a child's first fix after a restart only
+    seeds its state.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+        self._stats = {'fixes': 0, 'out_of_order': 0, 'anomalies': 0, 'emitted': 0, 'write_errors': 0, 'dropped': 0}
+
+    def observe_fix(self, child_id, lat, lon, ts):
+        """Update one child's state with a fix. Returns the anomaly dicts it triggers."""
+        found = []
+        with self._lock:
+            self._stats['fixes'] += 1
+            state = self._state.get(child_id)
+            if state is None:
+                state = self._state[child_id] = ChildStreamState()
+            elif ts <= state.ts:
+                # Retransmitted or late fix; the rolling state has already moved past it
+                self._stats['out_of_order'] += 1
+                return found
+            if state.ts is not None:
+                distance = float(haversine_m(state.lat, state.lon, lat, lon))
+                hours = (ts - state.ts).total_seconds() / 3600
+                speed = distance / 1000 / hours
+                if speed > SPEED_LIMIT_KMH and state.speed_kmh <= SPEED_LIMIT_KMH:
+                    found.append({
+                        'type': 'location',
+                        'description': f'Unusual movement speed detected: {speed:.0f} km/h',
+                        'severity': 'high'
+                    })
+                state.speed_kmh = speed
+                if _is_night(ts):
+                    if distance > NIGHT_MOVEMENT_M and not state.night_flagged:
+                        state.night_flagged = True
+                        found.append({
+                            'type': 'location',
+                            'description': f'Movement detected at unusual hour: {timezone.localtime(ts).strftime("%H:%M")}',
+                            'severity': 'high'
+                        })
+                else:
+                    state.night_flagged = False
+            state.lat, state.lon, state.ts = lat, lon, ts
+            self._stats['anomalies'] += len(found)
+        return found
+
+    def process_fixes(self, fixes):
+        """Evaluate (child_id, lat, lon, timestamp) fixes in time order and save what they trigger."""
+        if not settings.ANOMALY_STREAMING_ENABLED:
+            return []
+        found = []
+        for child_id, lat, lon, ts in sorted(fixes, key=lambda fix: fix[3]):
+            found.extend((child_id, anomaly) for anomaly in self.observe_fix(child_id, lat, lon, ts))
+        if found:
+            self.emit(found)
+        return found
+
+    def emit(self, found):
+        """Persist (child_id, anomaly) pairs and alert on them.
+
+        With the ai app installed they become Anomaly rows and high-severity ones are pushed
+        to the anomalies socket; otherwise admins get them through the notification inbox
+        (in-app, email, and push for high severity). Failures are logged at error level and
+        counted in get_stats() as write_errors / dropped; ingestion never fails on alerting.
+        """
+        try:
+            if apps.is_installed('ai'):
+                self._save_anomalies(found)
+            else:
+                self._notify_admins(found)
+        except Exception:
+            with self._lock:
+                self._stats['write_errors'] += 1
+                self._stats['dropped'] += len(found)
+            logger.exception(f"Dropped {len(found)} streamed anomalies")
+            return
+        with self._lock:
+            self._stats['emitted'] += len(found)
+
+    def _save_anomalies(self, found):
+        from ai.models import broadcast_high_severity_anomalies
+        Anomaly = apps.get_model('ai', 'Anomaly')
+        now = timezone.now()
+        created = Anomaly.objects.bulk_create([
+            Anomaly(
+                child_id=child_id,
+                anomaly_type=anomaly['type'],
+                description=anomaly['description'],
+                severity=anomaly['severity'],
+                timestamp=now
+            )
+            for child_id, anomaly in found
+        ])
+        broadcast_high_severity_anomalies(created)
+
+    def _notify_admins(self, found):
+        from core.models import User
+        from core.outbox import notify_many
+        admins = list(User.objects.filter(user_type='admin').only('id', 'email', 'profile_notify_email', 'profile_notify_push'))
+        for child_id, anomaly in found:
+            notify_many(
+                admins,
+                f"Anomaly detected for child {child_id}: {anomaly['description']}",
+                subject='Anomaly detected',
+                email=True,
+                push=anomaly['severity'] == 'high'
+            )
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, children=len(self._state))
+
+streaming_detector = StreamingAnomalyDetector()
@@ -1,12 +1,15 @@
 from django.urls import path
-from .views import child_risk_score, simulate_location_update, dashboard_child_locations, wearable_location_update, list_wearable_devices, create_wearable_device, set_wearable_device_active, delete_wearable_device
+from .views import child_risk_score, simulate_location_update, dashboard_child_locations, dashboard_broadcast_stats, streaming_anomaly_stats, wearable_location_update, wearable_location_bulk_update, list_wearable_devices, create_wearable_device, set_wearable_device_active, delete_wearable_device
 
 urlpatterns = []
 urlpatterns += [
     path('child/<int:child_id>/risk-score/', child_risk_score, name='child-risk-score'),
     path('child/<int:child_id>/simulate-location/', simulate_location_update, name='simulate-location-update'),
     path('dashboard/child-locations/', dashboard_child_locations, name='dashboard-child-locations'),
+    path('dashboard/broadcast-stats/', dashboard_broadcast_stats, name='dashboard-broadcast-stats'),
+    path('dashboard/streaming-anomaly-stats/', streaming_anomaly_stats, name='streaming-anomaly-stats'),
     path('wearable/location-update/', wearable_location_update, name='wearable-location-update'),
+    path('wearable/location-bulk-update/', wearable_location_bulk_update, name='wearable-location-bulk-update'),
     path('wearable/devices/', list_wearable_devices, name='list-wearable-devices'),
     path('wearable/devices/create/', create_wearable_device, name='create-wearable-device'),
     path('wearable/devices/<int:device_id>/set-active/', set_wearable_device_active, name='set-wearable-device-active'),
@@ -1,10 +1,19 @@
-from .models import Child, ChildAIProfile, Tracking, WearableDevice
+from .models import ChildAIProfile, LocationFix, Tracking, WearableDevice
+from .broadcast import dashboard_broadcaster
+from .streaming import streaming_detector
+from .roster import RISK_BANDS, filter_roster, roster_fingerprint, roster_queryset, roster_rows
 from .serializers import ChildAIProfileSerializer, WearableDeviceSerializer
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from core.utils import check_for_escaped_children
+from core.geofence import check_tracking, check_trackings
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition
+import hashlib
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -31,28 +40,63 @@ def simulate_location_update(request, child_id):
     tracking.last_known_location = f"{lat},{lon}"
     tracking.save()
     # Run escape detection for this child
-    check_for_escaped_children()
+    check_tracking(tracking)
     return Response({'detail': 'Location updated and escape detection triggered.'})
 
+def _roster_etag(request):
+    return hashlib.md5(f"{roster_fingerprint()}|{request.GET.urlencode()}".encode()).hexdigest()
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@condition(etag_func=_roster_etag)
 def dashboard_child_locations(request):
-    from .models import Child, Tracking, ChildAIProfile
-    children = Child.objects.all()
-    data = []
-    for child in children:
-        tracking = getattr(child, 'tracking_records', None)
-        tracking = tracking.last() if hasattr(tracking, 'last') else None
-        ai_profile = getattr(child, 'ai_profile', None)
-        data.append({
-            'id': child.id,
-            'name': f"{child.first_name} {child.last_name}",
-            'status': tracking.status if tracking else None,
-            'last_known_location': tracking.last_known_location if tracking else None,
-            'last_update': tracking.last_update if tracking else None,
-            'risk_score': ai_profile.escape_risk_score if ai_profile else None,
-        })
-    return Response(data)
+    """Child roster with latest tracking status/location and risk score, built in one query.
+
+    Query params: status (comma-separated), risk (low, medium or high) and
+    bbox=min_lat,min_lon,max_lat,max_lon. Without limit or cursor the response is the plain
+    list of rows, as it always was; with either it is one page,
+    {'results': [...], 'next_cursor': ...}, where cursor is the previous page's next_cursor.
+    Responses carry an ETag so unchanged polls get a 304.
+    """
+    statuses = [status for status in request.GET.get('status', '').split(',') if status]
+    risk_band = request.GET.get('risk')
+    if risk_band and risk_band not in RISK_BANDS:
+        return Response({'detail': f"risk must be one of {', '.join(RISK_BANDS)}."}, status=400)
+    bbox = None
+    if request.GET.get('bbox'):
+        try:
+            bbox = [float(v) for v in request.GET['bbox'].split(',')]
+        except ValueError:
+            bbox = []
+        if len(bbox) != 4:
+            return Response({'detail': 'bbox must be min_lat,min_lon,max_lat,max_lon.'}, status=400)
+    children = filter_roster(roster_queryset(), statuses, risk_band)
+    if 'limit' not in request.GET and 'cursor' not in request.GET:
+        return Response(roster_rows(children=children, bbox=bbox))
+
+    try:
+        limit = min(int(request.GET.get('limit', settings.ROSTER_PAGE_SIZE)), settings.ROSTER_MAX_PAGE_SIZE)
+        cursor = int(request.GET.get('cursor', 0))
+    except ValueError:
+        return Response({'detail': 'limit and cursor must be integers.'}, status=400)
+    if limit < 1:
+        return Response({'detail': 'limit must be positive.'}, status=400)
+    # Fetch one extra row to know whether another page follows
+    rows = roster_rows(children=children.filter(id__gt=cursor), limit=limit + 1, bbox=bbox)
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    return Response({'results': rows[:limit], 'next_cursor': next_cursor})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def dashboard_broadcast_stats(request):
+    """Coalescing counters for the dashboard broadcaster in this process."""
+    return Response(dashboard_broadcaster.get_stats())
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def streaming_anomaly_stats(request):
+    """Fixes evaluated and anomalies emitted or dropped by the streaming detector in this process."""
+    return Response(streaming_detector.get_stats())
 
 @api_view(['POST'])
 def wearable_location_update(request):
@@ -62,6 +106,9 @@ def wearable_location_update(request):
     lon = request.data.get('lon')
     if not device_id or not lat or not lon:
         return Response({'detail': 'device_id, lat, and lon required.'}, status=400)
+    fix = _parse_fix(request.data, timezone.now())
+    if fix is None:
+        return Response({'detail': 'Invalid location fix.'}, status=400)
     try:
         device = WearableDevice.objects.get(device_id=device_id, is_active=True)
         tracking = device.child.tracking_records.last()
@@ -69,13 +116,136 @@ def wearable_location_update(request):
             return Response({'detail': 'Tracking record not found for child.'}, status=404)
         tracking.last_known_location = f"{lat},{lon}"
         tracking.save()
+        _, fix_lat, fix_lon, timestamp, extras = fix
+        LocationFix.objects.bulk_create(
+            [LocationFix(child_id=device.child_id, device=device, timestamp=timestamp, latitude=fix_lat, longitude=fix_lon, **extras)],
+            ignore_conflicts=True,
+        )
         device.last_seen = timezone.now()
         device.save()
-        check_for_escaped_children()
+        check_tracking(tracking)
+        streaming_detector.process_fixes([(device.child_id, fix_lat, fix_lon, timestamp)])
         return Response({'detail': 'Location updated and escape detection triggered.'})
     except WearableDevice.DoesNotExist:
         return Response({'detail': 'Device not found or inactive.'}, status=404)
 
+def _optional_float(fix, key):
+    try:
+        return float(fix[key]) if fix.get(key) is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _parse_fix(fix, now):
+    """Validate one wearable fix. Returns (device_id, lat, lon, timestamp, extras) or None."""
+    try:
+        device_id = str(fix['device_id'])
+        lat = float(fix['lat'])
+        lon = float(fix['lon'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    timestamp = now
+    if fix.get('timestamp'):
+        timestamp = parse_datetime(str(fix['timestamp']))
+        if timestamp is None:
+            return None
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+    extras = {
+        'accuracy_m': _optional_float(fix, 'accuracy'),
+        'battery_level': _optional_float(fix, 'battery'),
+        'signal_strength': _optional_float(fix, 'signal'),
+    }
+    return device_id, lat, lon, timestamp, extras
+
+@api_view(['POST'])
+def wearable_location_bulk_update(request):
+    """Bulk endpoint for wearables uploading buffered fixes. Auth via device_id.
+
+    Expects {"fixes": [{"device_id": ..., "lat": ..., "lon": ..., "timestamp": ...}, ...]}
+    with optional accuracy, battery and signal per fix. Devices are resolved in one query,
+    every fix is appended to LocationFix, tracking rows are written with bulk_create/bulk_update
+    and escape detection only runs for the children whose fixes arrived. Fixes also feed the
+    streaming anomaly detector.
+    """
+    fixes = request.data.get('fixes')
+    if not isinstance(fixes, list) or not fixes:
+        return Response({'detail': 'fixes list required.'}, status=400)
+    if len(fixes) > settings.WEARABLE_BULK_MAX_FIXES:
+        return Response({'detail': f'At most {settings.WEARABLE_BULK_MAX_FIXES} fixes per request.'}, status=413)
+
+    now = timezone.now()
+    parsed = []
+    rejected = 0
+    for fix in fixes:
+        result = _parse_fix(fix, now) if isinstance(fix, dict) else None
+        if result is None:
+            rejected += 1
+        else:
+            parsed.append(result)
+
+    devices = {
+        device.device_id: device
+        for device in WearableDevice.objects.filter(
+            device_id__in={fix[0] for fix in parsed}, is_active=True
+        ).only('id', 'device_id', 'child_id')
+    }
+
+    # Every fix goes to the history table; Tracking only takes the newest fix per child
+    latest_fix = {}
+    history = []
+    unknown_devices = set()
+    for device_id, lat, lon, timestamp, extras in parsed:
+        device = devices.get(device_id)
+        if device is None:
+            unknown_devices.add(device_id)
+            continue
+        history.append(LocationFix(child_id=device.child_id, device_id=device.id, timestamp=timestamp, latitude=lat, longitude=lon, **extras))
+        current = latest_fix.get(device.child_id)
+        if current is None or timestamp >= current[2]:
+            latest_fix[device.child_id] = (lat, lon, timestamp)
+
+    with transaction.atomic():
+        # Retransmitted fixes collide on (child, timestamp) and are skipped
+        LocationFix.objects.bulk_create(history, ignore_conflicts=True, batch_size=1000)
+        latest_ids = (
+            Tracking.objects.filter(child_id__in=latest_fix)
+            .values('child_id')
+            .annotate(latest_id=Max('id'))
+            .values_list('latest_id', flat=True)
+        )
+        trackings = {t.child_id: t for t in Tracking.objects.filter(id__in=list(latest_ids))}
+        to_update = []
+        to_create = []
+        for child_id, (lat, lon, timestamp) in latest_fix.items():
+            tracking = trackings.get(child_id)
+            if tracking is None:
+                to_create.append(Tracking(child_id=child_id, last_seen=timestamp, last_known_location=f"{lat},{lon}"))
+            elif timestamp >= tracking.last_seen:
+                tracking.last_seen = timestamp
+                tracking.last_known_location = f"{lat},{lon}"
+                # bulk_update bypasses auto_now, so stamp it explicitly
+                tracking.last_update = now
+                to_update.append(tracking)
+        Tracking.objects.bulk_create(to_create)
+        Tracking.objects.bulk_update(to_update, ['last_seen', 'last_known_location', 'last_update'])
+        WearableDevice.objects.filter(id__in=[d.id for d in devices.values()]).update(last_seen=now)
+
+    streaming_detector.process_fixes([(fix.child_id, fix.latitude, fix.longitude, fix.timestamp) for fix in history])
+    updated = to_create + to_update
+    if updated:
+        check_trackings(updated)
+        # Bulk writes skip post_save, so mark the whole batch dirty at once
+        dashboard_broadcaster.mark_dirty([t.child_id for t in updated])
+    return Response({
+        'detail': 'Locations updated and escape detection triggered.',
+        'accepted': len(history),
+        'rejected': rejected,
+        'unknown_devices': sorted(unknown_devices),
+        'children_updated': len(updated),
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def list_wearable_devices(request):
@@ -1,4 +1,8 @@
 from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
-    name = 'core' 
\ No newline at end of file
+    name = 'core'
+
+    def ready(self):
+        # Dashboard counter signals for children, staff, donors and donations
+        import core.metrics  # noqa: F401
@@ -0,0 +1,396 @@
+import atexit
+import contextvars
+import glob
+import gzip
+import ipaddress
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from core.models import AuditLog, AuditRollup
+
+logger = logging.getLogger(__name__)
+
+# Buffered audit pipeline. log_audit_action() appends an entry to a per-process spool
+# file (so a crash loses nothing) and to an in-memory buffer; the buffer is written with
+# one bulk_create when it reaches AUDIT_BUFFER_SIZE or AUDIT_FLUSH_SECONDS after its first
+# entry. Spool files left behind by dead processes are replayed by recover(); a segment
+# whose insert failed is retried at the start of the next flush().
+# Delivery is at-least-once: a crash between the insert and the spool cleanup replays
+# that batch.
+#
+# Reads go through query() (filtered keyset pages, newest first). archive() moves rows
+# older than the retention window into gzipped JSON-lines files, one per month, and
+# folds them into AuditRollup daily counts.
+
+_request_meta = contextvars.ContextVar('audit_request_meta', default=None)
+
+class AuditContextMiddleware:
+    """Makes the client address and user agent of the current request available to audit entries."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request_meta.set(request_meta(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _request_meta.reset(token)
+
+def _valid_ip(value):
+    try:
+        return str(ipaddress.ip_address(value.strip())) if value else None
+    except ValueError:
+        return None
+
+def client_ip(request):
+    """
+    The client address. X-Forwarded-For is only honoured behind AUDIT_TRUSTED_PROXIES
+    proxies, counting from the right, since anything to their left is client supplied.
+    Anything that is not a valid IP address becomes None.
+    """
+    proxies = settings.AUDIT_TRUSTED_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies > 0 and forwarded:
+        hops = forwarded.split(',')
+        if len(hops) >= proxies:
+            return _valid_ip(hops[-proxies])
+    return _valid_ip(request.META.get('REMOTE_ADDR'))
+
+def request_meta(request):
+    return {'ip_address': client_ip(request), 'user_agent': request.META.get('HTTP_USER_AGENT')}
+
+def current_request_meta():
+    return _request_meta.get() or {'ip_address': None, 'user_agent': None}
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _to_row(entry):
+    return AuditLog(
+        user_id=entry['user_id'],
+        action=entry['action'],
+        model_name=entry['model_name'],
+        details=entry['details'],
+        ip_address=entry['ip_address'],
+        user_agent=entry['user_agent'],
+        timestamp=parse_datetime(entry['timestamp']),
+    )
+
+class AuditBuffer:
+    def __init__(self, spool_dir, max_size, max_seconds):
+        self.spool_dir = spool_dir
+        self.max_size = max_size
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._entries = []
+        self._spool = None
+        self._timer = None
+        self._recovered = False
+        # Set while a failed segment of this process is still on disk
+        self._retry_pending = False
+        self._stats = {'entries': 0, 'flushes': 0, 'rows_written': 0, 'errors': 0, 'recovered': 0}
+
+    def _spool_path(self, suffix=''):
+        return os.path.join(self.spool_dir, f'audit-{os.getpid()}.jsonl{suffix}')
+
+    def add(self, entry):
+        if not self._recovered:
+            self._recovered = True
+            self.recover()
+        flush_now = False
+        with self._lock:
+            if self._spool is None:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                self._spool = open(self._spool_path(), 'a', encoding='utf-8')
+            self._spool.write(json.dumps(entry, default=str) + '\n')
+            self._spool.flush()
+            self._entries.append(entry)
+            self._stats['entries'] += 1
+            if len(self._entries) >= self.max_size:
+                flush_now = True
+            else:
+                self._schedule_locked()
+        if flush_now:
+            self.flush()
+
+    def _schedule_locked(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_seconds, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        """Write failed segments and buffered entries now. A spool segment is removed only after its insert."""
+        with self._flush_lock:
+            retried = self._retry_failed() if self._retry_pending else 0
+            with self._lock:
+                entries = self._entries
+                self._entries = []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not entries:
+                    return retried
+                # Later entries go to a fresh spool while this segment is written
+                self._spool.close()
+                self._spool = None
+                segment = self._spool_path(f'.{time.time_ns()}.flushing')
+                os.replace(self._spool_path(), segment)
+            try:
+                AuditLog.objects.bulk_create([_to_row(entry) for entry in entries])
+            except Exception as e:
+                # The segment stays on disk; the next flush, on the timer if nothing else comes, retries it
+                with self._lock:
+                    self._stats['errors'] += 1
+                    self._retry_pending = True
+                    self._schedule_locked()
+                logger.error(f"Error writing {len(entries)} audit entries: {str(e)}")
+                return retried
+            os.remove(segment)
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += len(entries)
+            return retried + len(entries)
+
+    def _retry_failed(self):
+        """Insert this process's segments left by failed flushes or replays. Called under _flush_lock."""
+        pid = os.getpid()
+        retried = 0
+        failed = False
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, 'audit-*.jsonl.*'))):
+            name = os.path.basename(path)
+            if '.claimed-' in name:
+                if not name.endswith(f'.claimed-{pid}'):
+                    continue
+            elif not name.startswith(f'audit-{pid}.'):
+                continue
+            try:
+                retried += self._replay(path)
+            except Exception as e:
+                failed = True
+                logger.error(f"Error retrying audit spool {path}: {str(e)}")
+        with self._lock:
+            self._stats['rows_written'] += retried
+            self._retry_pending = failed
+            if failed:
+                self._schedule_locked()
+        return retried
+
+    def _replay(self, path):
+        """Claim a spool file and insert its entries. Returns the count; the file stays on disk on error."""
+        # Claim the file first so two processes never replay the same spool
+        claimed = f"{path.split('.claimed-')[0]}.claimed-{os.getpid()}"
+        os.rename(path, claimed)
+        with open(claimed, encoding='utf-8') as f:
+            # A torn last line from a crash mid-write is skipped
+            entries = []
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    pass
+        AuditLog.objects.bulk_create([_to_row(entry) for entry in entries])
+        os.remove(claimed)
+        return len(entries)
+
+    def recover(self):
+        """Insert entries from spool files of dead processes and this process's failed segments."""
+        # Serialized with flush() so an in-flight segment is never inserted twice
+        with self._flush_lock:
+            recovered = 0
+            for path in sorted(glob.glob(os.path.join(self.spool_dir, 'audit-*.jsonl*'))):
+                name = os.path.basename(path)
+                if '.claimed-' in name:
+                    # Being replayed by another process unless that one died too
+                    pid = int(name.rsplit('.claimed-', 1)[1])
+                else:
+                    pid = int(name.split('-')[1].split('.')[0])
+                if pid == os.getpid():
+                    # Our live spool is flushed normally; anything else with our pid is left over
+                    if name.endswith('.jsonl') and self._spool is not None:
+                        continue
+                elif _pid_alive(pid):
+                    continue
+                try:
+                    recovered += self._replay(path)
+                except FileNotFoundError:
+                    # Claimed by another process first
+                    continue
+                except Exception as e:
+                    logger.error(f"Error recovering audit spool {path}: {str(e)}")
+                    with self._lock:
+                        self._retry_pending = True
+            with self._lock:
+                self._stats['recovered'] += recovered
+            return recovered
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, buffered=len(self._entries))
+
+audit_buffer = AuditBuffer(settings.AUDIT_SPOOL_DIR, settings.AUDIT_BUFFER_SIZE, settings.AUDIT_FLUSH_SECONDS)
+atexit.register(audit_buffer.flush)
+
+def record(user, action, model_name, details=None, request=None):
+    """Queue one audit entry. Request metadata comes from `request` or the audit middleware."""
+    meta = request_meta(request) if request is not None else current_request_meta()
+    audit_buffer.add({
+        'user_id': user.id if user is not None and user.is_authenticated else None,
+        'action': action,
+        'model_name': model_name,
+        # Round-tripped so the buffer holds exactly what the spool (and the JSONField) stores
+        'details': json.loads(json.dumps(details, default=str)) if details else None,
+        'ip_address': meta['ip_address'],
+        'user_agent': meta['user_agent'],
+        'timestamp': timezone.now().isoformat(),
+    })
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+def encode_cursor(log):
+    return f"{(log.timestamp - EPOCH) // timedelta(microseconds=1)}.{log.id}"
+
+def decode_cursor(cursor):
+    """(timestamp, id) from a cursor string. Raises ValueError if malformed."""
+    micros, log_id = cursor.split('.')
+    log_id = int(log_id)
+    # timedelta and the database both overflow on out-of-range numbers
+    if not 0 <= log_id < 2 ** 63:
+        raise ValueError(f'Cursor id out of range: {cursor}')
+    try:
+        return EPOCH + timedelta(microseconds=int(micros)), log_id
+    except OverflowError:
+        raise ValueError(f'Cursor time out of range: {cursor}')
+
+def _parse_bound(value, end=False):
+    # Accepts a datetime or a date; a bare date "to" bound covers the whole day
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date: {value}')
+        moment = datetime.combine(day + timedelta(days=1) if end else day, datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+def query(filters=None, cursor=None, limit=100):
+    """
+    One page of audit entries, newest first. Returns (logs, next_cursor).
+
+    filters: user, model_name, action, ip_address, from, to (ISO date or datetime).
+    Raises ValueError for a malformed cursor or filter value.
+    """
+    filters = filters or {}
+    logs = AuditLog.objects.select_related('user')
+    if filters.get('user'):
+        logs = logs.filter(user_id=int(filters['user']))
+    if filters.get('model_name'):
+        logs = logs.filter(model_name=filters['model_name'])
+    if filters.get('action'):
+        logs = logs.filter(action=filters['action'])
+    if filters.get('ip_address'):
+        logs = logs.filter(ip_address=filters['ip_address'])
+    if filters.get('from'):
+        logs = logs.filter(timestamp__gte=_parse_bound(filters['from']))
+    if filters.get('to'):
+        logs = logs.filter(timestamp__lt=_parse_bound(filters['to'], end=True))
+    if cursor:
+        timestamp, log_id = decode_cursor(cursor)
+        logs = logs.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=log_id))
+    rows = list(logs.order_by('-timestamp', '-id')[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def serialize(log):
+    return {
+        'id': log.id,
+        'user': log.user.username if log.user_id else None,
+        'user_id': log.user_id,
+        'action': log.action,
+        'model_name': log.model_name,
+        'details': log.details,
+        'ip_address': log.ip_address,
+        'user_agent': log.user_agent,
+        'timestamp': log.timestamp.isoformat(),
+    }
+
+def _archive_row(log):
+    return {
+        'id': log.id,
+        'user_id': log.user_id,
+        'action': log.action,
+        'model_name': log.model_name,
+        'details': log.details,
+        'ip_address': log.ip_address,
+        'user_agent': log.user_agent,
+        'timestamp': log.timestamp.isoformat(),
+    }
+
+def _add_rollups(counts):
+    for (day, model_name, action), count in counts.items():
+        updated = AuditRollup.objects.filter(day=day, model_name=model_name, action=action).update(count=F('count') + count)
+        if not updated:
+            AuditRollup.objects.create(day=day, model_name=model_name, action=action, count=count)
+
+def archive(cutoff, archive_dir, batch_size=5000, dry_run=False):
+    """
+    Move entries older than `cutoff` to <archive_dir>/audit-YYYY-MM.jsonl.gz and AuditRollup.
+
+    Each batch is appended (as its own gzip member) and fsynced before its rows are
+    deleted, so a crash can repeat a batch in the archive but never lose one.
+    Returns {'archived': n, 'files': [paths]}.
+    """
+    old = AuditLog.objects.filter(timestamp__lt=cutoff)
+    if dry_run:
+        return {'archived': old.count(), 'files': []}
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = 0
+    files = set()
+    while True:
+        batch = list(old.order_by('id')[:batch_size])
+        if not batch:
+            break
+        by_month = {}
+        counts = Counter()
+        for log in batch:
+            local = timezone.localtime(log.timestamp)
+            by_month.setdefault(local.strftime('%Y-%m'), []).append(log)
+            counts[(local.date(), log.model_name, log.action)] += 1
+        for month, logs in by_month.items():
+            path = os.path.join(archive_dir, f'audit-{month}.jsonl.gz')
+            with open(path, 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                    for log in logs:
+                        f.write((json.dumps(_archive_row(log), default=str) + '\n').encode('utf-8'))
+                raw.flush()
+                os.fsync(raw.fileno())
+            files.add(path)
+        with transaction.atomic():
+            _add_rollups(counts)
+            AuditLog.objects.filter(id__in=[log.id for log in batch]).delete()
+        archived += len(batch)
+    return {'archived': archived, 'files': sorted(files)}
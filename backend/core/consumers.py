@@ -1,8 +1,20 @@
 import json
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.core.serializers.json import DjangoJSONEncoder
+from children.broadcast import PROTOCOL_VERSION, dashboard_broadcaster
+from core.inbox import group_name
 
 class DashboardConsumer(AsyncWebsocketConsumer):
+    """Dashboard delta-sync socket (see children.broadcast for the message format).
+
+    After connecting the client sends {"type": "hello", "v": 1, "since": <last seq or null>}.
+    It gets the patches it missed, or a snapshot if it is too far behind, followed by the
+    live patch stream. Messages at or below the client's seq are never sent twice.
+    """
+
     async def connect(self):
+        self.seq = None
         await self.channel_layer.group_add('dashboard', self.channel_name)
         await self.accept()
 
@@ -10,8 +22,60 @@ class DashboardConsumer(AsyncWebsocketConsumer):
         await self.channel_layer.group_discard('dashboard', self.channel_name)
 
     async def receive(self, text_data):
-        # This consumer is broadcast-only; ignore incoming messages
-        pass
+        try:
+            message = json.loads(text_data)
+        except ValueError:
+            return
+        if not isinstance(message, dict) or message.get('type') != 'hello':
+            return
+        if message.get('v', PROTOCOL_VERSION) != PROTOCOL_VERSION:
+            await self.send_json_message({'type': 'error', 'v': PROTOCOL_VERSION, 'detail': 'Unsupported protocol version.'})
+            await self.close()
+            return
+        since = message.get('since')
+        catch_up = None
+        if isinstance(since, int):
+            catch_up = dashboard_broadcaster.changes_since(since)
+        if catch_up is None:
+            catch_up = await database_sync_to_async(dashboard_broadcaster.snapshot)()
+        self.seq = catch_up['seq']
+        await self.send_json_message(catch_up)
 
     async def dashboard_update(self, event):
-        await self.send(text_data=json.dumps(event['data'])) 
\ No newline at end of file
+        data = event['data']
+        # Not synced yet: the hello reply will include this update
+        if self.seq is None:
+            return
+        if data['type'] == 'patch' and data['seq'] <= self.seq:
+            return
+        self.seq = data['seq']
+        await self.send_json_message(data)
+
+    async def send_json_message(self, data):
+        await self.send(text_data=json.dumps(data, cls=DjangoJSONEncoder))
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """Live inbox for the logged-in user: new notifications plus the current unread count."""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+        self.group = group_name(user.id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def notification_created(self, event):
+        await self.send_json_message({
+            'type': 'notification',
+            'notification': event['notification'],
+            'unread_count': event['unread_count'],
+        })
+
+    async def send_json_message(self, data):
+        await self.send(text_data=json.dumps(data, cls=DjangoJSONEncoder))
@@ -0,0 +1,43 @@
+import numpy as np
+
+# Shared vectorized geo math. Every function accepts scalars or NumPy arrays and broadcasts.
+
+EARTH_RADIUS_M = 6371000.0
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters between two sets of points (degrees)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_M * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def distance_matrix_m(lats, lons, zone_lats, zone_lons):
+    """N x M matrix of distances from N points to M zone centers."""
+    lats = np.asarray(lats, dtype=float)[:, None]
+    lons = np.asarray(lons, dtype=float)[:, None]
+    return haversine_m(lats, lons, np.asarray(zone_lats, dtype=float)[None, :], np.asarray(zone_lons, dtype=float)[None, :])
+
+def outside_safe_zones(lats, lons, zone_lats, zone_lons, zone_radii):
+    """Boolean array: True where a point lies outside every safe zone.
+
+    With no zones configured nothing is considered outside.
+    """
+    lats = np.asarray(lats, dtype=float)
+    if len(zone_lats) == 0 or lats.size == 0:
+        return np.zeros(lats.shape, dtype=bool)
+    distances = distance_matrix_m(lats, lons, zone_lats, zone_lons)
+    return ~np.any(distances <= np.asarray(zone_radii, dtype=float)[None, :], axis=1)
+
+def segment_speeds_kmh(lats, lons, timestamps):
+    """Speeds in km/h between consecutive fixes. timestamps are POSIX seconds.
+
+    Segments with a non-positive time delta get a speed of 0.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    if lats.size < 2:
+        return np.zeros(0)
+    distances_km = haversine_m(lats[:-1], lons[:-1], lats[1:], lons[1:]) / 1000
+    hours = np.diff(np.asarray(timestamps, dtype=float)) / 3600
+    speeds = np.zeros_like(distances_km)
+    np.divide(distances_km, hours, out=speeds, where=hours > 0)
+    return speeds
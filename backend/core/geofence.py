@@ -0,0 +1,122 @@
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from children.models import Tracking
+from core.geo import outside_safe_zones
+from core.models import CenterConfig, User
+from core.outbox import notify_many
+
+# Geofence engine with two paths:
+# - event: check_tracking()/check_trackings() evaluate only the child(ren) whose fix just arrived
+# - reconcile: reconcile() scans every in-center tracking row, run periodically by check_escapes
+# A child is inside when it is within the safe radius of any CenterConfig.
+
+_lock = threading.Lock()
+_zone_cache = {'zones': None, 'loaded_at': None}
+_metrics = {
+    'event': {'runs': 0, 'rows_checked': 0, 'escapes': 0, 'seconds': 0.0},
+    'reconcile': {'runs': 0, 'rows_checked': 0, 'escapes': 0, 'seconds': 0.0},
+    'center_config_loads': 0,
+}
+
+def zones_for(centers):
+    """(lats, lons, radii) arrays for the given CenterConfig objects."""
+    rows = [(c.latitude, c.longitude, c.safe_radius_m) for c in centers]
+    if not rows:
+        return np.zeros(0), np.zeros(0), np.zeros(0)
+    return tuple(np.array(col, dtype=float) for col in zip(*rows))
+
+def get_safe_zones():
+    """Return cached (lats, lons, radii) for every center, reloading after GEOFENCE_CENTER_CACHE_SECONDS."""
+    now = time.monotonic()
+    with _lock:
+        loaded_at = _zone_cache['loaded_at']
+        if loaded_at is not None and now - loaded_at < settings.GEOFENCE_CENTER_CACHE_SECONDS:
+            return _zone_cache['zones']
+    zones = zones_for(CenterConfig.objects.all())
+    with _lock:
+        _zone_cache['zones'] = zones
+        _zone_cache['loaded_at'] = now
+        _metrics['center_config_loads'] += 1
+    return zones
+
+def invalidate_center_cache():
+    with _lock:
+        _zone_cache['zones'] = None
+        _zone_cache['loaded_at'] = None
+
+def parse_location(location):
+    """Parse a "lat,lon" string into floats, or None if it is missing or malformed."""
+    if not location:
+        return None
+    try:
+        lat, lon = map(float, location.split(','))
+    except ValueError:
+        return None
+    return lat, lon
+
+def is_outside(lat, lon, zones):
+    return bool(outside_safe_zones([lat], [lon], *zones)[0])
+
+def _flag_escaped(tracking, admins):
+    tracking.status = 'escaped'
+    tracking.save()
+    notify_many(
+        admins,
+        message=f"Child {tracking.child} has left the center! Please take immediate action.",
+        subject='URGENT: Child Escaped from Center',
+        email=True,
+        push=True
+    )
+
+def _evaluate(path, trackings, zones):
+    started = time.perf_counter()
+    candidates = []
+    coords = []
+    for tracking in trackings:
+        if tracking.status != 'in_center':
+            continue
+        candidates.append(tracking)
+        coords.append(parse_location(tracking.last_known_location) or (np.nan, np.nan))
+    checked = len(candidates)
+    escaped = []
+    if candidates:
+        lats, lons = np.array(coords, dtype=float).T
+        # Rows without a parseable location never count as outside
+        outside = outside_safe_zones(lats, lons, *zones) & ~np.isnan(lats)
+        escaped = [tracking for tracking, flag in zip(candidates, outside) if flag]
+    if escaped:
+        # Admins are loaded once however many children escaped in this batch
+        admins = list(User.objects.filter(user_type='admin').only('id', 'email', 'profile_notify_email', 'profile_notify_push'))
+        for tracking in escaped:
+            _flag_escaped(tracking, admins)
+    with _lock:
+        stats = _metrics[path]
+        stats['runs'] += 1
+        stats['rows_checked'] += checked
+        stats['escapes'] += len(escaped)
+        stats['seconds'] += time.perf_counter() - started
+    return escaped
+
+def check_tracking(tracking):
+    """Event path: evaluate the newest fix of a single child against the cached safe zones."""
+    return _evaluate('event', [tracking], get_safe_zones())
+
+def check_trackings(trackings):
+    """Event path for a batch of freshly updated tracking rows (one per child)."""
+    return _evaluate('event', trackings, get_safe_zones())
+
+def reconcile(safe_zone=None):
+    """Reconciliation path: full scan of every in-center tracking row."""
+    trackings = Tracking.objects.filter(status='in_center').select_related('child')
+    zones = zones_for([safe_zone]) if safe_zone else get_safe_zones()
+    return _evaluate('reconcile', trackings, zones)
+
+def get_metrics():
+    with _lock:
+        return {
+            'event': dict(_metrics['event']),
+            'reconcile': dict(_metrics['reconcile']),
+            'center_config_loads': _metrics['center_config_loads'],
+        }
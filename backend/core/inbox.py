@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from core.models import Notification
+
+# Per-user notification inbox: keyset pages ordered newest first, a cached unread
+# counter kept current on create/read, and live pushes to the "notifications_<user id>"
+# socket group.
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+def group_name(user_id):
+    return f'notifications_{user_id}'
+
+def unread_count(user_id):
+    count = cache.get(_unread_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(_unread_key(user_id), count, settings.NOTIFICATION_UNREAD_CACHE_SECONDS)
+    return count
+
+def _adjust_unread(user_id, delta):
+    try:
+        cache.incr(_unread_key(user_id), delta)
+    except ValueError:
+        # Not cached; the next unread_count() recounts
+        pass
+
+def encode_cursor(notification):
+    return f"{(notification.created_at - EPOCH) // timedelta(microseconds=1)}.{notification.id}"
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor string. Raises ValueError if malformed."""
+    micros, notification_id = cursor.split('.')
+    notification_id = int(notification_id)
+    # timedelta and the database both overflow on out-of-range numbers
+    if not 0 <= notification_id < 2 ** 63:
+        raise ValueError(f'Cursor id out of range: {cursor}')
+    try:
+        return EPOCH + timedelta(microseconds=int(micros)), notification_id
+    except OverflowError:
+        raise ValueError(f'Cursor time out of range: {cursor}')
+
+def page(user_id, cursor=None, limit=50, unread_only=False):
+    """One page of a user's notifications, newest first. Returns (notifications, next_cursor)."""
+    notifications = Notification.objects.filter(user_id=user_id)
+    if unread_only:
+        notifications = notifications.filter(is_read=False)
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor)
+        notifications = notifications.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=notification_id))
+    rows = list(notifications.order_by('-created_at', '-id')[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def serialize(notification):
+    return {
+        'id': notification.id,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+def mark_read(user_id, ids=None):
+    """Mark the given notifications (or all) read with one UPDATE. Returns the number changed."""
+    unread = Notification.objects.filter(user_id=user_id, is_read=False)
+    if ids is not None:
+        unread = unread.filter(id__in=ids)
+    updated = unread.update(is_read=True)
+    if updated:
+        _adjust_unread(user_id, -updated)
+    return updated
+
+def publish(notifications):
+    """Count new notifications as unread and push them to their users' sockets after commit."""
+    by_user = {}
+    for notification in notifications:
+        by_user.setdefault(notification.user_id, []).append(notification)
+    for user_id, items in by_user.items():
+        _adjust_unread(user_id, sum(1 for n in items if not n.is_read))
+
+    def send():
+        channel_layer = get_channel_layer()
+        for user_id, items in by_user.items():
+            count = unread_count(user_id)
+            for notification in items:
+                async_to_sync(channel_layer.group_send)(group_name(user_id), {
+                    'type': 'notification_created',
+                    'notification': serialize(notification),
+                    'unread_count': count,
+                })
+    transaction.on_commit(send)
@@ -0,0 +1,24 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.audit import archive
+
+class Command(BaseCommand):
+    help = 'Archive audit entries older than the retention window to gzipped monthly files and daily rollups.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.AUDIT_RETENTION_DAYS, help='Keep this many days in the AuditLog table.')
+        parser.add_argument('--archive-dir', default=settings.AUDIT_ARCHIVE_DIR, help='Directory for audit-YYYY-MM.jsonl.gz files.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows archived and deleted per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        result = archive(cutoff, options['archive_dir'], batch_size=options['batch_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"{result['archived']} audit entries older than {cutoff:%Y-%m-%d} would be archived.")
+            return
+        for path in result['files']:
+            self.stdout.write(f"  {path}")
+        self.stdout.write(self.style.SUCCESS(f"Archived {result['archived']} audit entries older than {cutoff:%Y-%m-%d}."))
@@ -0,0 +1,43 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from children.models import Child
+from children.reports import child_columns
+from core.export import stream_csv
+import resource
+import time
+import tracemalloc
+
+class Command(BaseCommand):
+    help = 'Stream a CSV export of synthetic children (rolled back) and report time and memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Synthetic children to export.')
+        parser.add_argument('--gzip', action='store_true', help='Compress the stream.')
+        parser.add_argument('--max-peak-mb', type=float, default=32, help='Fail if Python allocations peak above this while streaming.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Child.objects.bulk_create([
+                Child(first_name=f'Child{i}', last_name='Export', date_of_birth=date(2012, 1, 1),
+                      gender='female' if i % 2 else 'male', unique_identifier=f'CSV-{i:07d}')
+                for i in range(options['rows'])
+            ], batch_size=5000)
+            children = Child.objects.filter(unique_identifier__startswith='CSV-').order_by('id')
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = stream_csv('children.csv', [(None, child_columns(), children)], compress=options['gzip'])
+            size = sum(len(chunk) for chunk in response.streaming_content)
+            seconds = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            transaction.set_rollback(True)
+
+        peak_mb = peak / (1024 * 1024)
+        self.stdout.write(f"Rows: {options['rows']}  bytes: {size}  time: {seconds:.2f}s")
+        self.stdout.write(f"Peak Python allocations while streaming: {peak_mb:.1f} MB  max RSS growth: {(rss_after - rss_before) / 1024:.1f} MB")
+        if peak_mb > options['max_peak_mb']:
+            raise CommandError(f"Streaming peaked at {peak_mb:.1f} MB, above {options['max_peak_mb']} MB.")
+        self.stdout.write(self.style.SUCCESS('CSV export streamed within the memory limit.'))
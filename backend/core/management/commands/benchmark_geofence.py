@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from core.geo import outside_safe_zones
+from math import radians, cos, sin, asin, sqrt
+import numpy as np
+import time
+
+class Command(BaseCommand):
+    help = 'Benchmark the vectorized geofence evaluator against the old per-row haversine loop.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='Numbers of children to evaluate.')
+        parser.add_argument('--centers', type=int, default=3, help='Number of safe zones.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the best is reported.')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        zone_lats = -1.95 + rng.uniform(-0.05, 0.05, options['centers'])
+        zone_lons = 30.06 + rng.uniform(-0.05, 0.05, options['centers'])
+        zone_radii = np.full(options['centers'], 100.0)
+
+        self.stdout.write(f"{'children':>10} {'loop ms':>10} {'vector ms':>10} {'speedup':>8}")
+        for size in options['sizes']:
+            lats = -1.95 + rng.uniform(-0.06, 0.06, size)
+            lons = 30.06 + rng.uniform(-0.06, 0.06, size)
+            # Both paths get coordinates parsed beforehand, so only the evaluators are timed
+            points = [(float(lat), float(lon)) for lat, lon in zip(lats, lons)]
+            zones = [(float(lat), float(lon), float(radius)) for lat, lon, radius in zip(zone_lats, zone_lons, zone_radii)]
+
+            loop_s = self._best(options['repeat'], lambda: [self._outside_loop(lat, lon, zones) for lat, lon in points])
+            vector_s = self._best(options['repeat'], lambda: outside_safe_zones(lats, lons, zone_lats, zone_lons, zone_radii))
+            self.stdout.write(f"{size:>10} {loop_s * 1000:>10.1f} {vector_s * 1000:>10.1f} {loop_s / vector_s:>7.0f}x")
+
+    def _best(self, repeat, fn):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def _outside_loop(self, lat1, lon1, zones):
+        # Mirrors the scalar haversine code previously in Tracking.is_outside_safe_zone
+        for lat2, lon2, radius in zones:
+            dlat = radians(lat2 - lat1)
+            dlon = radians(lon2 - lon1)
+            a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
+            if 6371000 * 2 * asin(sqrt(a)) <= radius:
+                return False
+        return True
@@ -1,9 +1,15 @@
 from django.core.management.base import BaseCommand
+from core.geofence import get_metrics
 from core.utils import check_for_escaped_children
 
 class Command(BaseCommand):
-    help = 'Check for children who have escaped and notify admins.'
+    help = 'Reconcile escape status for all in-center children and notify admins.'
 
     def handle(self, *args, **options):
-        check_for_escaped_children()
-        self.stdout.write(self.style.SUCCESS('Checked for escaped children and notified admins if needed.')) 
\ No newline at end of file
+        escaped = check_for_escaped_children()
+        metrics = get_metrics()['reconcile']
+        self.stdout.write(
+            f"Scanned {metrics['rows_checked']} tracking rows in {metrics['seconds'] * 1000:.1f} ms, "
+            f"{len(escaped)} newly escaped."
+        )
+        self.stdout.write(self.style.SUCCESS('Checked for escaped children and notified admins if needed.'))
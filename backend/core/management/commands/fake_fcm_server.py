@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.models import User, UserDevice
+from core.push import PushDispatcher, requests
+import json
+import threading
+
+DEAD_PREFIX = 'dead-'
+
+class FakeFCMHandler(BaseHTTPRequestHandler):
+    """Answers FCM HTTP v1 send requests; tokens starting with DEAD_PREFIX are UNREGISTERED."""
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        token = payload.get('message', {}).get('token', '')
+        dead = token.startswith(DEAD_PREFIX)
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.in_flight += 1
+            self.server.peak_in_flight = max(self.server.peak_in_flight, self.server.in_flight)
+        if dead:
+            status, body = 404, {'error': {
+                'code': 404, 'message': 'Requested entity was not found.', 'status': 'NOT_FOUND',
+                'details': [{'@type': 'type.googleapis.com/google.firebase.fcm.v1.FcmError', 'errorCode': 'UNREGISTERED'}],
+            }}
+        else:
+            status, body = 200, {'name': f'projects/fake/messages/{self.server.requests}'}
+        body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        if self.server.verbose:
+            print(f"FCM request: {token} {'dead' if dead else 'sent'}")
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(port, verbose=False):
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeFCMHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.in_flight = 0
+    server.peak_in_flight = 0
+    server.verbose = verbose
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+class Command(BaseCommand):
+    help = 'Run a local fake FCM server, or check the push dispatcher against one (--check).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=0, help='Port to listen on (0 picks a free one).')
+        parser.add_argument('--check', action='store_true', help='Send one alert to synthetic users and report FCM calls (rolled back).')
+        parser.add_argument('--users', type=int, default=300, help='Synthetic users for --check.')
+        parser.add_argument('--devices', type=int, default=2, help='Devices per synthetic user for --check.')
+        parser.add_argument('--dead', type=int, default=25, help='Synthetic tokens FCM reports as UNREGISTERED for --check.')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            server = start_server(options['port'], verbose=True)
+            self.stdout.write(f"Fake FCM listening; set FCM_ENDPOINT=http://127.0.0.1:{server.server_port}/v1/projects/{{project_id}}/messages:send")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                server.shutdown()
+            return
+
+        if requests is None:
+            raise CommandError('The requests package is required to talk to the fake server.')
+        server = start_server(options['port'])
+        session = requests.Session()
+        session.headers['Authorization'] = 'Bearer fake-token'
+        dispatcher = PushDispatcher(
+            f'http://127.0.0.1:{server.server_port}/v1/projects/fake/messages:send', None, settings.FCM_CONCURRENCY, session=session,
+        )
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(username=f'fcm-check-{i}', user_type='admin') for i in range(options['users'])
+                ])
+                devices = [
+                    UserDevice(user=user, device_token=f'tok-{user.username}-{d}')
+                    for user in users for d in range(options['devices'])
+                ]
+                for device in devices[:options['dead']]:
+                    device.device_token = DEAD_PREFIX + device.device_token
+                UserDevice.objects.bulk_create(devices)
+
+                stats = dispatcher.send([(user.id, 'URGENT: Child Escaped from Center', 'Check alert') for user in users])
+                remaining = UserDevice.objects.filter(device_token__startswith=DEAD_PREFIX, user__in=users).count()
+                transaction.set_rollback(True)
+        finally:
+            server.shutdown()
+
+        undelivered = sum(1 for error in stats['results'].values() if error is not None)
+        self.stdout.write(f"Users: {len(users)}  tokens: {len(devices)}  concurrency limit: {settings.FCM_CONCURRENCY}")
+        self.stdout.write(f"FCM calls for one alert: {server.requests} (peak {server.peak_in_flight} in flight)")
+        self.stdout.write(f"Dead tokens pruned: {stats['pruned']}, left behind: {remaining}")
+        if server.requests != len(devices) or server.peak_in_flight > settings.FCM_CONCURRENCY:
+            raise CommandError(f'Expected {len(devices)} calls within the concurrency limit.')
+        if remaining:
+            raise CommandError('Dead tokens were not pruned.')
+        if undelivered:
+            raise CommandError(f'{undelivered} users with a live device were reported undelivered.')
+        self.stdout.write(self.style.SUCCESS('Push dispatcher check passed.'))
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from core.audit import AuditBuffer, audit_buffer
+from core.models import AuditLog
+import glob
+import os
+import shutil
+import tempfile
+
+def _refuse_inserts(execute, sql, params, many, context):
+    # Stands in for a database outage during one flush
+    if sql.lstrip().upper().startswith('INSERT'):
+        raise DatabaseError('simulated outage')
+    return execute(sql, params, many, context)
+
+class Command(BaseCommand):
+    help = 'Write audit entries left in spool files by crashed or stopped processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Fail one flush, then check the next one writes its segment (rolled back).')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            recovered = audit_buffer.recover()
+            self.stdout.write(self.style.SUCCESS(f'Recovered {recovered} audit entries from {audit_buffer.spool_dir}.'))
+            return
+
+        spool_dir = tempfile.mkdtemp(prefix='audit-check-')
+        # Large limits so only the explicit flushes below write anything
+        buffer = AuditBuffer(spool_dir, 1000, 3600)
+        buffer._recovered = True
+        entry = {
+            'user_id': None, 'action': 'check', 'model_name': 'AuditSpoolCheck', 'details': None,
+            'ip_address': None, 'user_agent': None, 'timestamp': timezone.now().isoformat(),
+        }
+        try:
+            with transaction.atomic():
+                before = AuditLog.objects.count()
+                buffer.add(entry)
+                buffer.add(entry)
+                with transaction.atomic(), connection.execute_wrapper(_refuse_inserts):
+                    failed_flush = buffer.flush()
+                left_over = len(glob.glob(os.path.join(spool_dir, '*.flushing')))
+                buffer.add(entry)
+                next_flush = buffer.flush()
+                written = AuditLog.objects.count() - before
+                remaining = os.listdir(spool_dir)
+                transaction.set_rollback(True)
+        finally:
+            if buffer._timer is not None:
+                buffer._timer.cancel()
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+        self.stdout.write(f"Failed flush wrote {failed_flush} rows and left {left_over} segment(s) on disk")
+        self.stdout.write(f"Next flush wrote {next_flush} rows ({written} in the table), files left: {len(remaining)}")
+        if failed_flush or left_over != 1:
+            raise CommandError('The failed flush should write nothing and keep its segment.')
+        if next_flush != 3 or written != 3 or remaining:
+            raise CommandError('The next flush should retry the failed segment along with the new entry.')
+        self.stdout.write(self.style.SUCCESS('Audit spool retry check passed.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from core.models import NotificationDelivery
+from core.outbox import outbox_worker
+
+class Command(BaseCommand):
+    help = 'Deliver queued email and push notifications, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain what is due now and exit instead of running as a worker.')
+
+    def handle(self, *args, **options):
+        if not options['once']:
+            self.stdout.write(f"Notification worker running with {outbox_worker.threads} threads...")
+            outbox_worker.run_forever()
+        attempted = outbox_worker.drain()
+        counts = dict(NotificationDelivery.objects.order_by().values_list('status').annotate(n=Count('id')))
+        self.stdout.write(
+            f"Attempted {attempted} deliveries. Pending {counts.get('pending', 0)}, "
+            f"sent {counts.get('sent', 0)}, failed {counts.get('failed', 0)}."
+        )
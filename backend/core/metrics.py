@@ -0,0 +1,199 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from children.models import Child
+from core.models import CenterConfig, DashboardMetrics, DashboardMetricsHistory
+from donors.models import Donor, Donation
+from staff.models import Staff
+
+# Precomputed admin dashboard counters. Saves and deletes of children, staff, donors and
+# donations adjust DashboardMetrics rows with F() updates inside the writer's transaction;
+# bulk writes and queryset updates skip signals, so reconcile() recomputes every row from
+# grouped aggregates (reconcile_dashboard_metrics, run periodically) and records the daily
+# DashboardMetricsHistory snapshot used for trends.
+
+ALL = 'all'
+STATUS_FIELDS = {
+    'active': 'children_active',
+    'graduated': 'children_graduated',
+    'transferred': 'children_transferred',
+    'inactive': 'children_inactive',
+}
+# Donations count towards the totals once approved (see DonationViewSet.approve)
+COUNTED_DONATION_STATUS = 'approved'
+
+def center_scope(center_id):
+    return f'center:{center_id}'
+
+def _scopes(center_id):
+    return [ALL, center_scope(center_id)] if center_id else [ALL]
+
+def _apply(deltas):
+    """deltas: {scope: {field: delta}}. Scopes without a row wait for the next reconcile()."""
+    for scope, fields in deltas.items():
+        updates = {field: F(field) + delta for field, delta in fields.items() if delta}
+        if updates:
+            DashboardMetrics.objects.filter(scope=scope).update(**updates)
+
+def _child_deltas(deltas, state, sign):
+    status, center_id = state
+    for scope in _scopes(center_id):
+        deltas[scope]['children_total'] += sign
+        if status in STATUS_FIELDS:
+            deltas[scope][STATUS_FIELDS[status]] += sign
+
+def _new_deltas():
+    return defaultdict(lambda: defaultdict(int))
+
+@receiver(post_init, sender=Child)
+def remember_child_state(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields are never loaded just for this
+    if 'status' in instance.__dict__ and 'center_id' in instance.__dict__:
+        instance._metrics_state = (instance.status, instance.center_id)
+
+@receiver(post_save, sender=Child)
+def child_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = getattr(instance, '_metrics_state', None)
+    if not created and old_state is None:
+        # Loaded with deferred fields: the previous state is unknown and left to reconcile()
+        return
+    new_state = (instance.status, instance.center_id)
+    if old_state == new_state and not created:
+        return
+    deltas = _new_deltas()
+    if not created:
+        _child_deltas(deltas, old_state, -1)
+    _child_deltas(deltas, new_state, 1)
+    _apply(deltas)
+    instance._metrics_state = new_state
+
+@receiver(post_delete, sender=Child)
+def child_deleted(sender, instance, **kwargs):
+    deltas = _new_deltas()
+    _child_deltas(deltas, getattr(instance, '_metrics_state', None) or (instance.status, instance.center_id), -1)
+    _apply(deltas)
+
+@receiver(post_save, sender=Staff)
+def staff_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _apply({ALL: {'staff_count': 1}})
+
+@receiver(post_delete, sender=Staff)
+def staff_deleted(sender, instance, **kwargs):
+    _apply({ALL: {'staff_count': -1}})
+
+@receiver(post_save, sender=Donor)
+def donor_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _apply({ALL: {'donor_count': 1}})
+
+@receiver(post_delete, sender=Donor)
+def donor_deleted(sender, instance, **kwargs):
+    _apply({ALL: {'donor_count': -1}})
+
+def _donation_contribution(state):
+    status, amount = state
+    return (1, amount) if status == COUNTED_DONATION_STATUS else (0, 0)
+
+@receiver(post_init, sender=Donation)
+def remember_donation_state(sender, instance, **kwargs):
+    if 'status' in instance.__dict__ and 'amount' in instance.__dict__:
+        instance._metrics_state = (instance.status, instance.amount)
+
+@receiver(post_save, sender=Donation)
+def donation_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = (None, 0) if created else getattr(instance, '_metrics_state', None)
+    if old_state is None:
+        return
+    new_state = (instance.status, instance.amount)
+    old_count, old_total = _donation_contribution(old_state)
+    new_count, new_total = _donation_contribution(new_state)
+    _apply({ALL: {'donations_count': new_count - old_count, 'donations_total': new_total - old_total}})
+    instance._metrics_state = new_state
+
+@receiver(post_delete, sender=Donation)
+def donation_deleted(sender, instance, **kwargs):
+    count, total = _donation_contribution(getattr(instance, '_metrics_state', None) or (instance.status, instance.amount))
+    _apply({ALL: {'donations_count': -count, 'donations_total': -total}})
+
+@receiver(post_save, sender=CenterConfig)
+def center_created(sender, instance, created, raw=False, **kwargs):
+    # A new center has no children yet, so a zeroed row is exact
+    if created and not raw:
+        DashboardMetrics.objects.get_or_create(scope=center_scope(instance.id), defaults={'center': instance})
+
+def serialize(metrics):
+    return {
+        'children_count': metrics.children_total,
+        'staff_count': metrics.staff_count,
+        'donor_count': metrics.donor_count,
+        'active_children': metrics.children_active,
+        'graduated_children': metrics.children_graduated,
+        'children_by_status': {status: getattr(metrics, field) for status, field in STATUS_FIELDS.items()},
+        'donations_count': metrics.donations_count,
+        'total_donations': metrics.donations_total,
+        'updated_at': metrics.updated_at.isoformat() if metrics.updated_at else None,
+    }
+
+def reconcile(snapshot=True):
+    """Recompute every scope from the source tables and optionally record today's history. Returns the 'all' row."""
+    values = {ALL: {'center': None}}
+    for center in CenterConfig.objects.all():
+        values[center_scope(center.id)] = {'center': center}
+    for scope_values in values.values():
+        scope_values.update({field: 0 for field in ['children_total', *STATUS_FIELDS.values()]})
+    for center_id, status, count in Child.objects.order_by().values_list('center_id', 'status').annotate(n=Count('id')):
+        for scope in _scopes(center_id):
+            if scope not in values:
+                continue
+            values[scope]['children_total'] += count
+            if status in STATUS_FIELDS:
+                values[scope][STATUS_FIELDS[status]] += count
+    donations = Donation.objects.filter(status=COUNTED_DONATION_STATUS).aggregate(count=Count('id'), total=Sum('amount'))
+    values[ALL].update(
+        staff_count=Staff.objects.count(),
+        donor_count=Donor.objects.count(),
+        donations_count=donations['count'],
+        donations_total=donations['total'] or 0,
+    )
+    now = timezone.now()
+    with transaction.atomic():
+        rows = {}
+        for scope, defaults in values.items():
+            rows[scope], _ = DashboardMetrics.objects.update_or_create(scope=scope, defaults=dict(defaults, reconciled_at=now))
+        DashboardMetrics.objects.exclude(scope__in=list(values)).delete()
+        if snapshot:
+            today = timezone.localdate()
+            for scope, row in rows.items():
+                DashboardMetricsHistory.objects.update_or_create(
+                    day=today, scope=scope, defaults={'metrics': serialize(row)}
+                )
+    return rows[ALL]
+
+def current(scope=ALL):
+    """The metrics row for `scope`, reconciling once if the table has never been filled."""
+    metrics = DashboardMetrics.objects.filter(scope=scope).first()
+    if metrics is None and scope == ALL:
+        metrics = reconcile(snapshot=False)
+    return metrics
+
+def center_breakdown():
+    return [
+        dict(serialize(row), center_id=row.center_id, center=row.center.name)
+        for row in DashboardMetrics.objects.filter(center__isnull=False).select_related('center').order_by('center__name')
+    ]
+
+def history(days, scope=ALL):
+    since = timezone.localdate() - timedelta(days=days)
+    return [
+        dict(entry.metrics, day=entry.day.isoformat())
+        for entry in DashboardMetricsHistory.objects.filter(scope=scope, day__gte=since).order_by('day')
+    ]
@@ -0,0 +1,75 @@
+import ast
+from django.db import migrations, models
+
+
+def parse_details(text):
+    # Old rows hold str(dict); anything that is not a Python literal is kept as text
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return {'text': text}
+    if isinstance(value, (dict, list)):
+        return value
+    return {'text': text}
+
+
+def convert_details(apps, schema_editor):
+    AuditLog = apps.get_model('core', 'AuditLog')
+    batch = []
+    for log in AuditLog.objects.exclude(details__isnull=True).exclude(details='').only('id', 'details').iterator(chunk_size=2000):
+        log.details_json = parse_details(log.details)
+        batch.append(log)
+        if len(batch) >= 2000:
+            AuditLog.objects.bulk_update(batch, ['details_json'])
+            batch = []
+    AuditLog.objects.bulk_update(batch, ['details_json'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_alter_auditlog_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='details_json',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(convert_details, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='auditlog',
+            name='details',
+        ),
+        migrations.RenameField(
+            model_name='auditlog',
+            old_name='details_json',
+            new_name='details',
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp'], name='auditlog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['user', 'timestamp'], name='auditlog_user_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['model_name', 'action'], name='auditlog_model_action_idx'),
+        ),
+        migrations.CreateModel(
+            name='AuditRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('model_name', models.CharField(max_length=100)),
+                ('action', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'model_name', 'action'), name='auditrollup_unique_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_auditlog_json_details'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50, unique=True)),
+                ('children_total', models.IntegerField(default=0)),
+                ('children_active', models.IntegerField(default=0)),
+                ('children_graduated', models.IntegerField(default=0)),
+                ('children_transferred', models.IntegerField(default=0)),
+                ('children_inactive', models.IntegerField(default=0)),
+                ('staff_count', models.IntegerField(default=0)),
+                ('donor_count', models.IntegerField(default=0)),
+                ('donations_count', models.IntegerField(default=0)),
+                ('donations_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('center', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_metrics', to='core.centerconfig')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DashboardMetricsHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('scope', models.CharField(max_length=50)),
+                ('metrics', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'scope'), name='dashboardhistory_unique_day')],
+            },
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 class BaseModel(models.Model):
     is_active = models.BooleanField(default=True)
@@ -30,9 +34,55 @@ class Notification(BaseModel):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_inbox_idx'),
+            models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Notification for {self.user}: {self.message[:50]}" 
 
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    if created:
+        from core.inbox import publish
+        publish([instance])
+
+class NotificationDelivery(models.Model):
+    """Outbox row for one email or push delivery, sent by core.outbox outside the request."""
+    CHANNELS = (
+        ('email', 'Email'),
+        ('push', 'Push'),
+    )
+    STATUSES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='deliveries')
+    channel = models.CharField(max_length=10, choices=CHANNELS)
+    subject = models.CharField(max_length=255, blank=True)
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='delivery_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} to {self.user} ({self.status})"
+
 class CenterConfig(models.Model):
     name = models.CharField(max_length=100, default='Main Center')
     latitude = models.FloatField()
@@ -42,6 +92,11 @@ class CenterConfig(models.Model):
     def __str__(self):
         return f"{self.name} ({self.latitude}, {self.longitude})" 
 
+@receiver([post_save, post_delete], sender=CenterConfig)
+def center_config_changed(sender, **kwargs):
+    from core.geofence import invalidate_center_cache
+    invalidate_center_cache()
+
 class UserDevice(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='devices')
     device_token = models.CharField(max_length=255, unique=True)
@@ -55,10 +110,67 @@ class AuditLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     action = models.CharField(max_length=100)
     model_name = models.CharField(max_length=100)
-    details = models.TextField(blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    details = models.JSONField(blank=True, null=True)
+    # Set when the action happened, not when the buffered entry was written
+    timestamp = models.DateTimeField(default=timezone.now)
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     user_agent = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp'], name='auditlog_timestamp_idx'),
+            models.Index(fields=['user', 'timestamp'], name='auditlog_user_timestamp_idx'),
+            models.Index(fields=['model_name', 'action'], name='auditlog_model_action_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.timestamp} - {self.user} - {self.action} on {self.model_name}"
+
+class AuditRollup(models.Model):
+    # Daily action counts kept after the raw AuditLog rows are archived (archive_audit_logs)
+    day = models.DateField()
+    model_name = models.CharField(max_length=100)
+    action = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'model_name', 'action'], name='auditrollup_unique_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.action} on {self.model_name}: {self.count}"
+
+class DashboardMetrics(models.Model):
+    """Precomputed admin dashboard counters, one row per scope, kept current by core.metrics."""
+    # 'all' for the whole organisation or 'center:<id>'; center rows carry child counts only
+    scope = models.CharField(max_length=50, unique=True)
+    center = models.ForeignKey(CenterConfig, on_delete=models.CASCADE, null=True, blank=True, related_name='dashboard_metrics')
+    children_total = models.IntegerField(default=0)
+    children_active = models.IntegerField(default=0)
+    children_graduated = models.IntegerField(default=0)
+    children_transferred = models.IntegerField(default=0)
+    children_inactive = models.IntegerField(default=0)
+    staff_count = models.IntegerField(default=0)
+    donor_count = models.IntegerField(default=0)
+    donations_count = models.IntegerField(default=0)
+    donations_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard metrics ({self.scope})"
+
+class DashboardMetricsHistory(models.Model):
+    """Daily snapshot of a DashboardMetrics row for trend charts."""
+    day = models.DateField()
+    scope = models.CharField(max_length=50)
+    metrics = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'scope'], name='dashboardhistory_unique_day'),
+        ]
+
     def __str__(self):
-        return f"{self.timestamp} - {self.user} - {self.action} on {self.model_name}" 
\ No newline at end of file
+        return f"{self.day} - {self.scope}"
@@ -0,0 +1,185 @@
+import logging
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import close_old_connections, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from core.inbox import publish
+from core.models import Notification, NotificationDelivery
+from core.push import push_dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Notification outbox. Request paths only write rows (in-app Notification plus one
+# NotificationDelivery per allowed email/push channel); a worker claims due deliveries, sends them on a
+# thread pool and reschedules failures with exponential backoff.
+
+# A 'sending' row older than this is assumed to belong to a dead worker and is retried
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+def notify_many(users, message, subject=None, email=False, push=False):
+    """Notify many users at once: one bulk_create for the in-app rows and one for deliveries.
+
+    In-app only unless email / push are requested; those are still queued only where the
+    user's profile_notify_email / profile_notify_push allow. Never blocks on delivery.
+    Returns per-channel counts.
+    """
+    if isinstance(users, QuerySet):
+        users = users.only('id', 'email', 'profile_notify_email', 'profile_notify_push')
+    return notify_bulk([(user, message) for user in users], subject=subject, email=email, push=push)
+
+def notify_bulk(notifications, subject=None, email=False, push=False):
+    """notify_many() for (user, message) pairs with different messages, still one bulk_create per table."""
+    notifications = list(notifications)
+    counts = {'in_app': len(notifications), 'email': 0, 'push': 0}
+    if not notifications:
+        return counts
+    # bulk_create skips post_save, so publish to the inbox counters and sockets here
+    publish(Notification.objects.bulk_create([Notification(user=user, message=message) for user, message in notifications]))
+    now = timezone.now()
+    deliveries = []
+    for user, message in notifications:
+        if email and user.profile_notify_email and user.email:
+            deliveries.append(NotificationDelivery(user=user, channel='email', subject=subject or '', message=message, next_attempt_at=now))
+        if push and user.profile_notify_push:
+            deliveries.append(NotificationDelivery(user=user, channel='push', subject=subject or '', message=message, next_attempt_at=now))
+    if deliveries:
+        NotificationDelivery.objects.bulk_create(deliveries)
+        for delivery in deliveries:
+            counts[delivery.channel] += 1
+        # Wake the worker once the rows are visible to its connection
+        transaction.on_commit(outbox_worker.wake)
+    return counts
+
+def backoff(attempts):
+    """Delay before retry number `attempts`, doubling each time, capped, with +/-20% jitter."""
+    seconds = min(settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.NOTIFICATION_RETRY_MAX_SECONDS)
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+def _deliver_email(delivery):
+    """Send one email delivery. Returns None on success or the error text."""
+    try:
+        send_mail(
+            subject=delivery.subject or 'Notification',
+            message=delivery.message,
+            from_email=None,
+            recipient_list=[delivery.user.email],
+            fail_silently=False
+        )
+        return None
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+    finally:
+        # Pool threads each hold their own connection
+        close_old_connections()
+
+def claim(batch_size):
+    """Atomically take up to batch_size due deliveries for this worker."""
+    now = timezone.now()
+    due = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT)
+    ids = list(NotificationDelivery.objects.filter(due).order_by('next_attempt_at').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Rows another worker claimed since the select no longer match `due` and are skipped
+    NotificationDelivery.objects.filter(due, id__in=ids).update(status='sending', claim_token=token, claimed_at=now)
+    return list(NotificationDelivery.objects.filter(claim_token=token, status='sending').select_related('user'))
+
+def process_batch(pool, batch_size):
+    """Claim, send and record one batch. Returns the number of deliveries attempted."""
+    deliveries = claim(batch_size)
+    if not deliveries:
+        return 0
+    emails = [delivery for delivery in deliveries if delivery.channel == 'email']
+    pushes = [delivery for delivery in deliveries if delivery.channel == 'push']
+    errors = dict(zip((delivery.id for delivery in emails), pool.map(_deliver_email, emails)))
+    if pushes:
+        # Pushes for the whole batch go out through one dispatcher call; only the deliveries
+        # that did not reach any device are retried
+        keys = {delivery.id: (delivery.user_id, delivery.subject or 'Notification', delivery.message) for delivery in pushes}
+        try:
+            results = push_dispatcher.send(list(keys.values()))['results']
+            errors.update((delivery_id, results.get(key)) for delivery_id, key in keys.items())
+        except Exception as e:
+            # Only reached when the device lookup fails, before any request was made
+            logger.exception("Push dispatch failed")
+            errors.update((delivery_id, str(e) or e.__class__.__name__) for delivery_id in keys)
+    now = timezone.now()
+    for delivery in deliveries:
+        error = errors[delivery.id]
+        delivery.attempts += 1
+        delivery.claim_token = ''
+        if error is None:
+            delivery.status = 'sent'
+            delivery.sent_at = now
+            delivery.last_error = ''
+        elif delivery.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            delivery.status = 'failed'
+            delivery.last_error = error
+            logger.error(f"Giving up on {delivery.channel} delivery {delivery.id} after {delivery.attempts} attempts: {error}")
+        else:
+            delivery.status = 'pending'
+            delivery.next_attempt_at = now + backoff(delivery.attempts)
+            delivery.last_error = error
+    NotificationDelivery.objects.bulk_update(
+        deliveries, ['status', 'attempts', 'claim_token', 'sent_at', 'next_attempt_at', 'last_error']
+    )
+    return len(deliveries)
+
+class OutboxWorker:
+    """Drains the outbox on a thread pool, woken by enqueue() and polling for retries.
+
+    With NOTIFICATION_INPROCESS_WORKER the web process starts it on first use as a daemon
+    thread; otherwise run it with the process_notifications command.
+    """
+
+    def __init__(self, threads, batch_size, poll_seconds):
+        self.threads = threads
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        if not settings.NOTIFICATION_INPROCESS_WORKER:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run_forever, name='notification-outbox', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def drain(self):
+        """Process batches until nothing is due. Returns the number of deliveries attempted."""
+        total = 0
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            while True:
+                try:
+                    attempted = process_batch(pool, self.batch_size)
+                except Exception as e:
+                    logger.error(f"Error processing notification outbox: {str(e)}")
+                    break
+                finally:
+                    close_old_connections()
+                if not attempted:
+                    break
+                total += attempted
+        return total
+
+    def run_forever(self):
+        while True:
+            self._wakeup.clear()
+            self.drain()
+            self._wakeup.wait(self.poll_seconds)
+
+outbox_worker = OutboxWorker(
+    settings.NOTIFICATION_WORKER_THREADS,
+    settings.NOTIFICATION_BATCH_SIZE,
+    settings.NOTIFICATION_POLL_SECONDS,
+)
@@ -0,0 +1,135 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from core.models import UserDevice
+try:
+    import requests
+except ImportError:
+    requests = None
+try:
+    from google.auth.transport.requests import AuthorizedSession
+    from google.oauth2 import service_account
+except ImportError:
+    AuthorizedSession = None
+    service_account = None
+
+logger = logging.getLogger(__name__)
+
+FCM_SCOPE = 'https://www.googleapis.com/auth/firebase.messaging'
+# FCM HTTP v1 error codes meaning the token will never work again
+DEAD_TOKEN_ERRORS = {'UNREGISTERED', 'SENDER_ID_MISMATCH'}
+
+def _error_code(response):
+    """The FcmError code of a failed HTTP v1 response, else its status or the HTTP status."""
+    try:
+        error = response.json().get('error', {})
+    except ValueError:
+        error = {}
+    for detail in error.get('details', []):
+        if detail.get('errorCode'):
+            return detail['errorCode']
+    return error.get('status') or f'HTTP {response.status_code}'
+
+class PushDispatcher:
+    """Sends push messages through the FCM HTTP v1 API with one reused, authorized session.
+
+    HTTP v1 takes one device token per request, so messages for many users are grouped by
+    content, their device tokens are loaded in one query and up to `concurrency` requests
+    are in flight at once. Tokens FCM reports as unregistered are deleted.
+    Without FCM_PROJECT_ID and FCM_CREDENTIALS_FILE (or requests and google-auth) messages
+    are only logged, as before.
+    """
+
+    def __init__(self, endpoint, credentials_file, concurrency, session=None):
+        self.endpoint = endpoint
+        self.credentials_file = credentials_file
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        # A ready session (e.g. for a local fake server) skips the service account
+        self._session = session
+
+    @property
+    def enabled(self):
+        if self._session is not None:
+            return True
+        return bool(self.endpoint and self.credentials_file and requests and service_account)
+
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                credentials = service_account.Credentials.from_service_account_file(self.credentials_file, scopes=[FCM_SCOPE])
+                self._session = AuthorizedSession(credentials)
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.concurrency)
+                self._session.mount('https://', adapter)
+                self._session.mount('http://', adapter)
+            return self._session
+
+    def _send_one(self, token, title, body):
+        """'sent', 'dead', or the error text for one token."""
+        try:
+            response = self.session().post(self.endpoint, json={
+                'message': {'token': token, 'notification': {'title': title, 'body': body}},
+            }, timeout=10)
+        except Exception as e:
+            return str(e) or e.__class__.__name__
+        if response.ok:
+            return 'sent'
+        code = _error_code(response)
+        return 'dead' if code in DEAD_TOKEN_ERRORS else code
+
+    def send(self, messages):
+        """Deliver (user_id, title, body) messages. Returns request counts and per-message results.
+
+        stats['results'] maps each (user_id, title, body) to None once at least one of the
+        user's devices accepted it (or the user has no live device), otherwise to the error,
+        so callers retry only the messages that did not get through.
+        """
+        stats = {'requests': 0, 'success': 0, 'failure': 0, 'pruned': 0, 'results': {}}
+        groups = {}
+        for user_id, title, body in messages:
+            groups.setdefault((title, body), set()).add(user_id)
+        user_ids = set().union(*groups.values()) if groups else set()
+        tokens_by_user = {}
+        for user_id, token in UserDevice.objects.filter(user_id__in=user_ids).values_list('user_id', 'device_token'):
+            tokens_by_user.setdefault(user_id, []).append(token)
+
+        dead = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for (title, body), users in groups.items():
+                sends = [(user_id, token) for user_id in users for token in tokens_by_user.get(user_id, [])]
+                stats['requests'] += len(sends)
+                if not self.enabled:
+                    for _, token in sends:
+                        logger.info(f"Push to {token}: {title or ''} {body}")
+                    outcomes = ['sent'] * len(sends)
+                else:
+                    outcomes = list(pool.map(lambda send: self._send_one(send[1], title, body), sends))
+                errors = {}
+                delivered = set()
+                for (user_id, token), outcome in zip(sends, outcomes):
+                    if outcome == 'sent':
+                        stats['success'] += 1
+                        delivered.add(user_id)
+                        continue
+                    stats['failure'] += 1
+                    if outcome == 'dead':
+                        dead.add(token)
+                    else:
+                        errors.setdefault(user_id, outcome)
+                for user_id in users:
+                    stats['results'][(user_id, title, body)] = None if user_id in delivered else errors.get(user_id)
+
+        if dead:
+            # The messages already went out, so a failed cleanup must not fail the send
+            try:
+                stats['pruned'] = UserDevice.objects.filter(device_token__in=dead).delete()[0]
+            except Exception:
+                logger.exception(f"Could not prune {len(dead)} dead device tokens")
+        return stats
+
+push_dispatcher = PushDispatcher(
+    settings.FCM_ENDPOINT.format(project_id=settings.FCM_PROJECT_ID) if settings.FCM_PROJECT_ID else None,
+    settings.FCM_CREDENTIALS_FILE,
+    settings.FCM_CONCURRENCY,
+)
@@ -8,7 +8,13 @@ urlpatterns = [
     path('staff-dashboard/', views.staff_dashboard, name='staff_dashboard'),
     path('admin-printable-children-report/', views.admin_printable_children_report, name='admin_printable_children_report'),
     path('admin-printable-children-report-csv/', views.admin_printable_children_report_csv, name='admin_printable_children_report_csv'),
+    path('geofence-metrics/', views.geofence_metrics, name='geofence_metrics'),
+    path('model-metrics/', views.model_metrics, name='model_metrics'),
+    path('audit-logs/', views.audit_logs, name='audit_logs'),
     path('register-device-token/', register_device_token, name='register-device-token'),
     path('deregister-device-token/', deregister_device_token, name='deregister-device-token'),
     path('set-notification-preferences/', set_notification_preferences, name='set-notification-preferences'),
+    path('notifications/', views.notification_inbox, name='notification_inbox'),
+    path('notifications/unread-count/', views.notification_unread_count, name='notification_unread_count'),
+    path('notifications/mark-read/', views.notifications_mark_read, name='notifications_mark_read'),
 ] 
\ No newline at end of file
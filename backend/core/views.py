@@ -2,15 +2,16 @@ from django.shortcuts import render
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from .permissions import IsAdmin, IsDonor, IsStaff
-from children.models import Child, Enrollment, AcademicRecord
+from children.models import Enrollment
 from donors.models import Donor, Sponsorship, Donation
 from staff.models import Staff, StaffAssignment
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
-from children.serializers import ChildSerializer, ParentGuardianSerializer, AcademicRecordSerializer, BudgetRecordSerializer
-import csv
-from django.http import HttpResponse
+from reports.generators import children_report, children_sections
+from core.export import export_response
 from core.utils import log_audit_action
+from core.geofence import get_metrics as get_geofence_metrics
+from core import audit, inbox, metrics
 from .models import UserDevice
 from rest_framework.permissions import IsAuthenticated
 
@@ -19,20 +20,17 @@ User = get_user_model()
 @api_view(['GET'])
 @permission_classes([IsAdmin])
 def admin_dashboard(request):
-    children_count = Child.objects.count()
-    staff_count = Staff.objects.count()
-    donor_count = Donor.objects.count()
-    active_children = Child.objects.filter(status='active').count()
-    graduated_children = Child.objects.filter(status='graduated').count()
-    total_donations = Donation.objects.filter(status='received').aggregate(total=models.Sum('amount'))['total'] or 0
-    return Response({
-        'children_count': children_count,
-        'staff_count': staff_count,
-        'donor_count': donor_count,
-        'active_children': active_children,
-        'graduated_children': graduated_children,
-        'total_donations': total_donations,
-    })
+    """Precomputed counters (core.metrics). ?centers=1 adds the per-center breakdown, ?history=<days> the daily trend."""
+    data = metrics.serialize(metrics.current())
+    if request.GET.get('centers') in ('1', 'true'):
+        data['centers'] = metrics.center_breakdown()
+    if request.GET.get('history'):
+        try:
+            days = min(int(request.GET['history']), settings.DASHBOARD_HISTORY_MAX_DAYS)
+        except ValueError:
+            return Response({'detail': 'history must be a number of days.'}, status=400)
+        data['history'] = metrics.history(max(days, 1))
+    return Response(data)
 
 @api_view(['GET'])
 @permission_classes([IsDonor])
@@ -59,30 +57,47 @@ def staff_dashboard(request):
 @api_view(['GET'])
 @permission_classes([IsAdmin])
 def admin_printable_children_report(request):
-    children = Child.objects.all()
-    children_data = ChildSerializer(children, many=True, context={'request': request}).data
-    # Optionally include related data
-    for child in children_data:
-        child_id = child['id']
-        child['parents'] = ParentGuardianSerializer(ParentGuardian.objects.filter(child_id=child_id), many=True, context={'request': request}).data
-        child['academic_records'] = AcademicRecordSerializer(AcademicRecord.objects.filter(child_id=child_id), many=True, context={'request': request}).data
-        child['budget_records'] = BudgetRecordSerializer(BudgetRecord.objects.filter(child_id=child_id), many=True, context={'request': request}).data
+    # Parents, academic and budget records are prefetched: a fixed number of queries per report.
+    # POST reports/jobs/ renders the same report in the background and caches it.
+    children_data = children_report(request.user)
     log_audit_action(request.user, 'generate_report', 'Child', details={'type': 'admin_printable_children_report'})
     return Response({'children_report': children_data})
 
 @api_view(['GET'])
 @permission_classes([IsAdmin])
 def admin_printable_children_report_csv(request):
-    from children.models import Child
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="children_report.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'First Name', 'Last Name', 'Gender', 'Status', 'Unique ID'])
-    for child in Child.objects.all():
-        writer.writerow([child.id, child.first_name, child.last_name, child.gender, child.status, child.unique_identifier])
+    # ?columns=id,first_name,... selects columns, ?gzip=1 compresses
+    try:
+        response = export_response(request, 'children_report.csv', children_sections(request.user, {}))
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=400)
     log_audit_action(request.user, 'export_csv', 'Child', details={'type': 'admin_printable_children_report_csv'})
     return response
 
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def geofence_metrics(request):
+    """Work done by the event-driven and reconciliation geofence paths in this process."""
+    return Response(get_geofence_metrics())
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def model_metrics(request):
+    """Loaded model versions, load times and inference latency histograms in this process."""
+    from ai.model_registry import model_registry
+    return Response(model_registry.get_stats())
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def audit_logs(request):
+    """Newest-first audit entries. Query params: user, model_name, action, ip_address, from, to, limit, cursor."""
+    try:
+        limit = min(int(request.GET.get('limit', settings.AUDIT_PAGE_SIZE)), settings.AUDIT_MAX_PAGE_SIZE)
+        logs, next_cursor = audit.query(request.GET, cursor=request.GET.get('cursor'), limit=max(limit, 1))
+    except ValueError:
+        return Response({'detail': 'Invalid filter, limit or cursor.'}, status=400)
+    return Response({'results': [audit.serialize(log) for log in logs], 'next_cursor': next_cursor})
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def register_device_token(request):
@@ -116,4 +131,42 @@ def set_notification_preferences(request):
     if push is not None:
         user.profile_notify_push = bool(push)
     user.save()
-    return Response({'detail': 'Notification preferences updated.'}) 
\ No newline at end of file
+    return Response({'detail': 'Notification preferences updated.'})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def notification_inbox(request):
+    """Newest-first notifications for the current user. Query params: limit, cursor, unread=1."""
+    try:
+        limit = min(int(request.GET.get('limit', settings.NOTIFICATION_PAGE_SIZE)), settings.NOTIFICATION_MAX_PAGE_SIZE)
+        notifications, next_cursor = inbox.page(
+            request.user.id,
+            cursor=request.GET.get('cursor'),
+            limit=max(limit, 1),
+            unread_only=request.GET.get('unread') in ('1', 'true'),
+        )
+    except ValueError:
+        return Response({'detail': 'Invalid limit or cursor.'}, status=400)
+    return Response({
+        'results': [inbox.serialize(n) for n in notifications],
+        'next_cursor': next_cursor,
+        'unread_count': inbox.unread_count(request.user.id),
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def notification_unread_count(request):
+    return Response({'unread_count': inbox.unread_count(request.user.id)})
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def notifications_mark_read(request):
+    # {"ids": [1, 2, 3]} or {"all": true}
+    ids = request.data.get('ids')
+    if request.data.get('all'):
+        ids = None
+    elif not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        return Response({'detail': 'ids list or all=true required.'}, status=400)
+    updated = inbox.mark_read(request.user.id, ids)
+    return Response({'updated': updated, 'unread_count': inbox.unread_count(request.user.id)})
+
@@ -4,10 +4,10 @@ from core.permissions import IsDonor
 from .models import Donor, Sponsorship, Donation
 from children.serializers import ChildSerializer, BudgetRecordSerializer
 from children.models import Child, BudgetRecord
-from django.db import models
-import csv
-from django.http import HttpResponse
+from reports.generators import donor_impact_report, donor_impact_sections
+from core.export import export_response
 from core.utils import log_audit_action
+from core.outbox import notify_many
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from django.db.models import Sum
@@ -15,6 +15,15 @@ from django.utils import timezone
 from .serializers import DonorSerializer, DonationSerializer, SponsorshipSerializer
 from core.models import Notification, User
 
+DONATION_COLUMNS = [
+    ('receipt_number', 'Receipt Number', 'receipt_number'),
+    ('donation_date', 'Date', 'donation_date'),
+    ('amount', 'Amount', 'amount'),
+    ('donation_type', 'Type', 'donation_type'),
+    ('status', 'Status', 'status'),
+    ('description', 'Description', 'description'),
+]
+
 @api_view(['GET'])
 @permission_classes([IsDonor])
 def sponsored_children(request):
@@ -44,46 +53,32 @@ def impact_report(request):
 @api_view(['GET'])
 @permission_classes([IsDonor])
 def printable_impact_report(request):
-    donor = Donor.objects.get(user=request.user)
-    sponsorships = Sponsorship.objects.filter(donor=donor, status='active')
-    children = [s.child for s in sponsorships]
-    children_data = ChildSerializer(children, many=True, context={'request': request}).data
-    donations = Donation.objects.filter(donor=donor, status='received')
-    total_donated = donations.aggregate(total=models.Sum('amount'))['total'] or 0
-    impact_data = {
-        'sponsored_children': children_data,
-        'total_donated': total_donated,
-        'donation_history': list(donations.values('amount', 'donation_date', 'status')),
-    }
+    impact_data = donor_impact_report(request.user)
     log_audit_action(request.user, 'generate_report', 'Donor', details={'type': 'printable_impact_report'})
     return Response({'printable_impact_report': impact_data})
 
 @api_view(['GET'])
 @permission_classes([IsDonor])
 def printable_impact_report_csv(request):
-    donor = Donor.objects.get(user=request.user)
-    sponsorships = Sponsorship.objects.filter(donor=donor, status='active')
-    children = [s.child for s in sponsorships]
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="donor_impact_report.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['Child ID', 'First Name', 'Last Name', 'Gender', 'Status', 'Unique ID'])
-    for child in children:
-        writer.writerow([child.id, child.first_name, child.last_name, child.gender, child.status, child.unique_identifier])
-    donations = Donation.objects.filter(donor=donor, status='received')
-    writer.writerow([])
-    writer.writerow(['Donation History'])
-    writer.writerow(['Amount', 'Date', 'Status'])
-    for d in donations:
-        writer.writerow([d.amount, d.donation_date, d.status])
+    try:
+        response = export_response(request, 'donor_impact_report.csv', donor_impact_sections(request.user, {}))
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=400)
     log_audit_action(request.user, 'export_csv', 'Donor', details={'type': 'printable_impact_report_csv'})
     return response
 
 @api_view(['GET'])
 @permission_classes([IsDonor])
 def export_csv(request):
-    # Placeholder for CSV export logic
-    return Response({"message": "CSV export functionality will be implemented here."})
+    """The donor's full donation history as CSV. Supports ?columns= and ?gzip=1."""
+    donor = Donor.objects.get(user=request.user)
+    donations = Donation.objects.filter(donor=donor).order_by('donation_date', 'id')
+    try:
+        response = export_response(request, 'donations.csv', [(None, DONATION_COLUMNS, donations)])
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=400)
+    log_audit_action(request.user, 'export_csv', 'Donation', details={'type': 'donations_csv'})
+    return response
 
 @api_view(['GET'])
 @permission_classes([IsDonor])
@@ -142,10 +137,10 @@ class DonationViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         donation = serializer.save()
-        # Create notification for admin
-        Notification.objects.create(
-            user=User.objects.filter(user_type='admin').first(),
-            message=f"New donation received from {donation.donor.user.username} for {donation.amount}"
+        # Notify every admin in one write
+        notify_many(
+            User.objects.filter(user_type='admin'),
+            f"New donation received from {donation.donor.user.username} for {donation.amount}"
         )
 
     @action(detail=True, methods=['post'])
@@ -210,10 +205,10 @@ class SponsorshipViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         sponsorship = serializer.save()
-        # Create notification for admin
-        Notification.objects.create(
-            user=User.objects.filter(user_type='admin').first(),
-            message=f"New sponsorship request from {sponsorship.donor.user.username} for {sponsorship.child}"
+        # Notify every admin in one write
+        notify_many(
+            User.objects.filter(user_type='admin'),
+            f"New sponsorship request from {sponsorship.donor.user.username} for {sponsorship.child}"
         )
 
     @action(detail=True, methods=['post'])
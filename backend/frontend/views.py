@@ -4,6 +4,8 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
 from ai.models import Anomaly
 from django.utils import timezone
+from django.conf import settings
+from core import audit, inbox
 
 @login_required
 def staff_dashboard(request):
@@ -23,8 +25,13 @@ def donor_dashboard(request):
 
 @login_required
 def notifications(request):
-    notes = Notification.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'frontend/notifications.html', {'notifications': notes})
+    # First page only; the template pages on with next_cursor and gets new ones over the socket
+    notes, next_cursor = inbox.page(request.user.id, limit=settings.NOTIFICATION_PAGE_SIZE)
+    return render(request, 'frontend/notifications.html', {
+        'notifications': notes,
+        'next_cursor': next_cursor,
+        'unread_count': inbox.unread_count(request.user.id),
+    })
 
 @login_required
 def device_management(request):
@@ -33,8 +40,12 @@ def device_management(request):
 
 @login_required
 def audit_log(request):
-    logs = AuditLog.objects.all().order_by('-timestamp')[:100]
-    return render(request, 'frontend/audit_log.html', {'logs': logs})
+    # Same filters and keyset cursor as the core/audit-logs/ API
+    try:
+        logs, next_cursor = audit.query(request.GET, cursor=request.GET.get('cursor'), limit=settings.AUDIT_PAGE_SIZE)
+    except ValueError:
+        logs, next_cursor = [], None
+    return render(request, 'frontend/audit_log.html', {'logs': logs, 'next_cursor': next_cursor, 'filters': request.GET})
 
 @login_required
 def settings_view(request):
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class ReportsConfig(AppConfig):
+    name = 'reports'
+
+    def ready(self):
+        # Signals that bump the data version of report source tables
+        import reports.generators  # noqa: F401
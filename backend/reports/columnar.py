@@ -0,0 +1,235 @@
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from children.models import Child, BudgetRecord
+from donors.models import Donation
+from reports.models import ExportWatermark
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Columnar (Parquet / Arrow IPC) exports for analytics. A dataset is read in chunks from a
+# values_list() iterator ordered by its watermark column, turned into one Arrow record batch
+# per (record type, month) partition, and appended to
+#   <dir>/<dataset>/record_type=<type>/month=<YYYY-MM>/part-<run>.<ext>
+# Runs are incremental: only rows past the dataset's ExportWatermark are read, so a row that
+# was updated again appears in a later part too; consumers keep the newest row per id.
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+class Dataset:
+    def __init__(self, name, queryset, columns, watermark, record_type, month):
+        self.name = name
+        self.queryset = queryset
+        # (field, arrow type name) pairs; see _arrow_type()
+        self.columns = columns
+        self.fields = [field for field, _ in columns]
+        # The watermark (a datetime), record type and month fields must be among the columns
+        self.watermark = watermark
+        self.record_type = record_type
+        self.month = month
+        self.partition_index = (self.fields.index(record_type), self.fields.index(month))
+
+DATASETS = {
+    'children': Dataset(
+        'children', lambda: Child.objects.all(),
+        [('id', 'int64'), ('unique_identifier', 'string'), ('first_name', 'string'), ('last_name', 'string'),
+         ('gender', 'string'), ('date_of_birth', 'date'), ('status', 'string'), ('is_active', 'bool'),
+         ('created_at', 'timestamp'), ('updated_at', 'timestamp')],
+        watermark='updated_at', record_type='status', month='created_at',
+    ),
+    'budget_records': Dataset(
+        'budget_records', lambda: BudgetRecord.objects.all(),
+        [('id', 'int64'), ('child_id', 'int64'), ('record_type', 'string'), ('record_date', 'date'),
+         ('amount', 'decimal'), ('description', 'string'), ('created_by_id', 'int64'),
+         ('created_at', 'timestamp'), ('updated_at', 'timestamp')],
+        watermark='updated_at', record_type='record_type', month='record_date',
+    ),
+    'donations': Dataset(
+        'donations', lambda: Donation.objects.all(),
+        [('id', 'int64'), ('donor_id', 'int64'), ('amount', 'decimal'), ('donation_type', 'string'),
+         ('donation_date', 'date'), ('status', 'string'), ('is_anonymous', 'bool'), ('receipt_number', 'string'),
+         ('created_at', 'timestamp'), ('updated_at', 'timestamp')],
+        watermark='updated_at', record_type='donation_type', month='donation_date',
+    ),
+}
+
+# Anomalies are exported only where the ai app with its Anomaly model is installed
+if apps.is_installed('ai'):
+    DATASETS['anomalies'] = Dataset(
+        'anomalies', lambda: apps.get_model('ai', 'Anomaly').objects.all(),
+        [('id', 'int64'), ('child_id', 'int64'), ('anomaly_type', 'string'), ('severity', 'string'),
+         ('description', 'string'), ('timestamp', 'timestamp')],
+        watermark='timestamp', record_type='anomaly_type', month='timestamp',
+    )
+
+def _arrow_type(name):
+    return {
+        'int64': pa.int64(),
+        'string': pa.string(),
+        'bool': pa.bool_(),
+        'date': pa.date32(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+        'decimal': pa.decimal128(12, 2),
+    }[name]
+
+def schema(dataset):
+    return pa.schema([(field, _arrow_type(kind)) for field, kind in dataset.columns])
+
+def encode_cursor(moment, row_id):
+    return f"{(moment - EPOCH) // timedelta(microseconds=1)}.{row_id}"
+
+def decode_cursor(cursor):
+    """(watermark, id) from a cursor string. Raises ValueError if malformed."""
+    micros, row_id = cursor.split('.')
+    row_id = int(row_id)
+    # timedelta and the database both overflow on out-of-range numbers
+    if not 0 <= row_id < 2 ** 63:
+        raise ValueError(f'Cursor id out of range: {cursor}')
+    try:
+        return EPOCH + timedelta(microseconds=int(micros)), row_id
+    except OverflowError:
+        raise ValueError(f'Cursor time out of range: {cursor}')
+
+def _column(kind, values):
+    if kind == 'int64' and None not in values:
+        # Wraps the NumPy buffer without copying
+        return pa.array(np.fromiter(values, dtype=np.int64, count=len(values)))
+    if kind == 'timestamp':
+        values = [timezone.localtime(v, dt_timezone.utc).replace(tzinfo=None) if v is not None else None for v in values]
+    return pa.array(values, type=_arrow_type(kind))
+
+def record_batch(dataset, rows):
+    """An Arrow record batch from values_list() tuples, built column by column."""
+    columns = list(zip(*rows)) if rows else [()] * len(dataset.columns)
+    return pa.RecordBatch.from_arrays(
+        [_column(kind, list(values)) for (_, kind), values in zip(dataset.columns, columns)],
+        schema=schema(dataset),
+    )
+
+def changed_rows(dataset, since=None, until=None, chunk_size=None):
+    """
+    values_list() iterator over rows past `since` and up to `until`, both (watermark, id)
+    pairs, ordered by watermark then id.
+    """
+    field = dataset.watermark
+    rows = dataset.queryset()
+    if since is not None:
+        rows = rows.filter(Q(**{f'{field}__gt': since[0]}) | Q(**{field: since[0], 'id__gt': since[1]}))
+    if until is not None:
+        rows = rows.filter(Q(**{f'{field}__lt': until[0]}) | Q(**{field: until[0], 'id__lte': until[1]}))
+    return rows.order_by(field, 'id').values_list(*dataset.fields).iterator(chunk_size=chunk_size or settings.COLUMNAR_CHUNK_SIZE)
+
+def high_water_mark(dataset):
+    """(watermark, id) of the newest row now, or None when the table is empty."""
+    last = dataset.queryset().order_by(f'-{dataset.watermark}', '-id').values_list(dataset.watermark, 'id').first()
+    return tuple(last) if last else None
+
+def chunks(dataset, since=None, until=None, chunk_size=None):
+    """Lists of row tuples, chunk_size at a time."""
+    chunk_size = chunk_size or settings.COLUMNAR_CHUNK_SIZE
+    chunk = []
+    for row in changed_rows(dataset, since, until, chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _partition(dataset, row):
+    type_index, month_index = dataset.partition_index
+    month = row[month_index]
+    return row[type_index] or 'unknown', month.strftime('%Y-%m') if month else 'unknown'
+
+class _PartitionWriters:
+    # One open Parquet / IPC file writer per partition touched by this run
+    def __init__(self, base_dir, dataset, fmt, run_id):
+        self.base_dir = base_dir
+        self.dataset = dataset
+        self.fmt = fmt
+        self.run_id = run_id
+        self.schema = schema(dataset)
+        self.writers = {}
+        self.paths = []
+
+    def write(self, key, batch):
+        writer = self.writers.get(key)
+        if writer is None:
+            record_type, month = key
+            directory = os.path.join(self.base_dir, self.dataset.name, f'record_type={record_type}', f'month={month}')
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'part-{self.run_id}.{EXTENSIONS[self.fmt]}')
+            if self.fmt == 'parquet':
+                writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+            else:
+                writer = pa.ipc.new_file(path, self.schema)
+            self.writers[key] = writer
+            self.paths.append(path)
+        writer.write_batch(batch)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+def export_dataset(name, fmt='parquet', base_dir=None, full=False, chunk_size=None):
+    """
+    Write rows changed since the dataset's watermark as partitioned files and advance it.
+
+    Returns {'dataset', 'rows', 'files', 'watermark'}. Raises ValueError for an unknown
+    dataset or format and RuntimeError when pyarrow is not installed.
+    """
+    if pa is None:
+        raise RuntimeError('pyarrow is required for columnar exports.')
+    if name not in DATASETS:
+        raise ValueError(f'Unknown dataset: {name}')
+    if fmt not in EXTENSIONS:
+        raise ValueError(f'Unknown format: {fmt}')
+    dataset = DATASETS[name]
+    base_dir = base_dir or settings.COLUMNAR_EXPORT_DIR
+    mark, _ = ExportWatermark.objects.get_or_create(dataset=name, format=fmt)
+    since = None if full or mark.watermark is None else (mark.watermark, mark.last_id)
+    # Rows arriving while we export wait for the next run
+    until = high_water_mark(dataset)
+    if until is None or (since is not None and until <= since):
+        return {'dataset': name, 'rows': 0, 'files': [], 'watermark': mark.watermark}
+    writers = _PartitionWriters(base_dir, dataset, fmt, timezone.now().strftime('%Y%m%dT%H%M%S%f'))
+    rows = 0
+    try:
+        for chunk in chunks(dataset, since, until, chunk_size):
+            partitions = {}
+            for row in chunk:
+                partitions.setdefault(_partition(dataset, row), []).append(row)
+            for key, partition_rows in partitions.items():
+                writers.write(key, record_batch(dataset, partition_rows))
+            rows += len(chunk)
+    finally:
+        writers.close()
+    # Only advanced once every file is complete; a failed run is repeated from the old mark
+    mark.watermark, mark.last_id = until
+    mark.rows_exported += rows
+    mark.save()
+    return {'dataset': name, 'rows': rows, 'files': writers.paths, 'watermark': mark.watermark}
+
+# IPC end-of-stream marker: continuation token followed by a zero length
+END_OF_STREAM = b'\xff\xff\xff\xff\x00\x00\x00\x00'
+
+def arrow_stream(dataset, since=None, until=None, chunk_size=None):
+    """
+    Yield an Arrow IPC stream as bytes: the schema message, one record batch message per
+    chunk of rows in (since, until], then the end marker. No rows when `until` is None.
+    """
+    yield schema(dataset).serialize().to_pybytes()
+    if until is not None:
+        for chunk in chunks(dataset, since, until, chunk_size):
+            yield record_batch(dataset, chunk).serialize().to_pybytes()
+    yield END_OF_STREAM
@@ -0,0 +1,160 @@
+import hashlib
+import json
+from types import SimpleNamespace
+from django.db.models import Count, F, Max, Sum
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from children.models import Child, ParentGuardian, AcademicRecord, BudgetRecord
+from children.reports import build_children_report, child_columns, report_queryset
+from children.serializers import ChildSerializer
+from donors.models import Donor, Sponsorship, Donation
+from reports.models import ReportSourceVersion
+from staff.models import Staff, StaffAssignment
+
+# Report types that can be rendered in the background by reports.jobs. Each one has a
+# builder for the JSON payload, CSV sections for core.export, the roles allowed to run it
+# and the source models whose changes invalidate cached artifacts. Many-to-many tables are
+# listed through their through model.
+
+REPORTS = {}
+
+DONATION_HISTORY_COLUMNS = [
+    ('amount', 'Amount', 'amount'),
+    ('donation_date', 'Date', 'donation_date'),
+    ('donation_status', 'Status', 'status'),
+]
+
+class ReportType:
+    def __init__(self, name, title, build, sections, roles, sources, per_user):
+        self.name = name
+        self.title = title
+        self.build = build
+        self.sections = sections
+        self.roles = roles
+        self.sources = sources
+        # Per-user reports are cached per requester, others per role
+        self.per_user = per_user
+
+    def allowed(self, user):
+        return getattr(user, 'user_type', None) in self.roles
+
+    def scope(self, user):
+        return f'user:{user.id}' if self.per_user else f'role:{user.user_type}'
+
+def register_report(name, title, sections, roles, sources, per_user=False):
+    def decorator(func):
+        REPORTS[name] = ReportType(name, title, func, sections, roles, sources, per_user)
+        return func
+    return decorator
+
+def data_version(models):
+    """
+    Fingerprint of the given tables: row count and latest updated_at, one aggregate each,
+    plus the write counters bumped by touch_sources(). Through tables have no updated_at,
+    so only their count and counter are used.
+    """
+    versions = dict(ReportSourceVersion.objects.filter(label__in=[m._meta.label for m in models]).values_list('label', 'version'))
+    parts = []
+    for model in models:
+        if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+            stats = model.objects.aggregate(rows=Count('id'), updated=Max('updated_at'))
+        else:
+            stats = {'rows': model.objects.count(), 'updated': None}
+        updated = stats['updated'].isoformat() if stats['updated'] else ''
+        parts.append(f"{model._meta.label}:{stats['rows']}:{updated}:{versions.get(model._meta.label, 0)}")
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+def touch_sources(*models):
+    """
+    Bump the write counter of each model. Saves, deletes and many-to-many changes do this
+    from signals; queryset.update() and bulk_update() send none, so callers using them on a
+    report source must call this themselves.
+    """
+    for model in models:
+        label = model._meta.label
+        if not ReportSourceVersion.objects.filter(label=label).update(version=F('version') + 1):
+            ReportSourceVersion.objects.get_or_create(label=label, defaults={'version': 1})
+
+def _source_saved(sender, raw=False, **kwargs):
+    if not raw:
+        touch_sources(sender)
+
+def _source_deleted(sender, **kwargs):
+    touch_sources(sender)
+
+def _source_m2m_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        touch_sources(sender)
+
+def _connect_sources():
+    for model in {model for report in REPORTS.values() for model in report.sources}:
+        uid = f'report-source:{model._meta.label}'
+        post_save.connect(_source_saved, sender=model, dispatch_uid=uid)
+        post_delete.connect(_source_deleted, sender=model, dispatch_uid=uid)
+        # m2m_changed is sent with the through model as sender
+        m2m_changed.connect(_source_m2m_changed, sender=model, dispatch_uid=uid)
+
+def cache_key(report, fmt, params, user):
+    raw = json.dumps([report.name, fmt, params, report.scope(user)], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _context(user):
+    # Serializers only read request.user
+    return {'request': SimpleNamespace(user=user)}
+
+def _children(params):
+    children = Child.objects.order_by('id')
+    if params.get('status'):
+        children = children.filter(status=params['status'])
+    return children
+
+def children_sections(user, params):
+    return [(None, child_columns('ID'), _children(params))]
+
+@register_report('children', 'Children report', children_sections, roles=('admin',),
+                 sources=(Child, ParentGuardian, ParentGuardian.children.through, AcademicRecord, BudgetRecord))
+def children_report(user, params=None):
+    params = params or {}
+    children = report_queryset()
+    if params.get('status'):
+        children = children.filter(status=params['status'])
+    return build_children_report(_context(user), children)
+
+def _sponsored_children(donor):
+    return Child.objects.filter(sponsorships__donor=donor, sponsorships__status='active').order_by('id')
+
+def donor_impact_sections(user, params):
+    donor = Donor.objects.get(user=user)
+    return [
+        (None, child_columns(), _sponsored_children(donor)),
+        ('Donation History', DONATION_HISTORY_COLUMNS, Donation.objects.filter(donor=donor, status='approved').order_by('donation_date', 'id')),
+    ]
+
+@register_report('donor_impact', 'Donor impact report', donor_impact_sections, roles=('donor',),
+                 sources=(Child, Sponsorship, Donation), per_user=True)
+def donor_impact_report(user, params=None):
+    donor = Donor.objects.get(user=user)
+    donations = Donation.objects.filter(donor=donor, status='approved')
+    return {
+        'sponsored_children': ChildSerializer(_sponsored_children(donor), many=True, context=_context(user)).data,
+        'total_donated': donations.aggregate(total=Sum('amount'))['total'] or 0,
+        'donation_history': list(donations.values('amount', 'donation_date', 'status')),
+    }
+
+def _assigned_children(staff):
+    return Child.objects.filter(assignments__staff=staff, assignments__is_active=True).order_by('id')
+
+def staff_assigned_sections(user, params):
+    return [(None, child_columns(), _assigned_children(Staff.objects.get(user=user)))]
+
+@register_report('staff_assigned_children', 'Assigned children report', staff_assigned_sections, roles=('staff',),
+                 sources=(Child, StaffAssignment, AcademicRecord, BudgetRecord), per_user=True)
+def staff_assigned_children_report(user, params=None):
+    staff = Staff.objects.get(user=user)
+    children = report_queryset().filter(assignments__staff=staff, assignments__is_active=True)
+    report = build_children_report(_context(user), children)
+    # Staff reports have never listed parents
+    for child in report:
+        child.pop('parents', None)
+    return report
+
+_connect_sources()
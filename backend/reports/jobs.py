@@ -0,0 +1,211 @@
+import hashlib
+import io
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from core.export import csv_lines
+from reports.generators import REPORTS, cache_key, data_version
+from reports.models import Document, ReportJob
+
+try:
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+except ImportError:
+    SimpleDocTemplate = None
+
+logger = logging.getLogger(__name__)
+
+# Background report jobs. request_report() answers from a finished artifact when the
+# same report (type, format, params, viewer scope) was already rendered against the
+# current data version, joins a job already in flight, or queues a new one. A worker
+# claims queued jobs, renders them on a thread pool and stores the output as a
+# Document; identical output is stored once.
+
+# A 'running' job older than this is assumed to belong to a dead worker and is retried
+CLAIM_TIMEOUT = timedelta(minutes=15)
+
+CONTENT_TYPES = {'json': 'application/json', 'csv': 'text/csv', 'pdf': 'application/pdf'}
+
+def request_report(user, report_type, fmt='json', params=None):
+    """
+    Return (job, cached) for a report request. Raises ValueError for an unknown report or
+    format and PermissionError when the user may not run it.
+    """
+    params = params or {}
+    report = REPORTS.get(report_type)
+    if report is None:
+        raise ValueError(f'Unknown report: {report_type}')
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f'Unknown format: {fmt}')
+    if fmt == 'pdf' and SimpleDocTemplate is None:
+        raise ValueError('PDF reports require reportlab.')
+    if not report.allowed(user):
+        raise PermissionError(f'Not allowed to run {report_type}.')
+    key = cache_key(report, fmt, params, user)
+    version = data_version(report.sources)
+    existing = ReportJob.objects.filter(cache_key=key, data_version=version).exclude(status='failed')
+    done = existing.filter(status='done', document__isnull=False).order_by('-finished_at').first()
+    if done is not None:
+        # Recorded as the requester's own finished job pointing at the shared artifact
+        job = ReportJob.objects.create(
+            report_type=report_type, format=fmt, params=params, cache_key=key, data_version=version,
+            requested_by=user, status='done', document=done.document, finished_at=timezone.now(),
+        )
+        return job, True
+    in_flight = existing.filter(status__in=['queued', 'running']).order_by('created_at').first()
+    if in_flight is not None:
+        return in_flight, False
+    job = ReportJob.objects.create(
+        report_type=report_type, format=fmt, params=params, cache_key=key, data_version=version, requested_by=user,
+    )
+    transaction.on_commit(report_worker.wake)
+    return job, False
+
+def _render_pdf(title, sections):
+    buffer = io.BytesIO()
+    styles = getSampleStyleSheet()
+    story = [Paragraph(title, styles['Title'])]
+    for section_title, columns, queryset in sections:
+        if section_title:
+            story.append(Paragraph(section_title, styles['Heading2']))
+        rows = [[header for _, header, _ in columns]]
+        rows.extend([str(value) for value in row] for row in queryset.values_list(*[field for _, _, field in columns]).iterator())
+        story.append(Table(rows, repeatRows=1))
+        story.append(Spacer(1, 12))
+    SimpleDocTemplate(buffer, pagesize=landscape(A4)).build(story)
+    return buffer.getvalue()
+
+def render(job, user):
+    """The report's bytes in the job's format."""
+    report = REPORTS[job.report_type]
+    if job.format == 'json':
+        return json.dumps(report.build(user, job.params), cls=DjangoJSONEncoder).encode('utf-8')
+    sections = report.sections(user, job.params)
+    if job.format == 'csv':
+        return ''.join(csv_lines(sections)).encode('utf-8')
+    return _render_pdf(report.title, sections)
+
+def store_document(job, content):
+    content_hash = hashlib.sha256(content).hexdigest()
+    document = Document.objects.filter(content_hash=content_hash).first()
+    if document is not None:
+        return document
+    document = Document(
+        name=f'{job.report_type}-{content_hash[:12]}.{job.format}',
+        content_type=CONTENT_TYPES[job.format],
+        content_hash=content_hash,
+        size=len(content),
+    )
+    try:
+        with transaction.atomic():
+            document.file.save(document.name, ContentFile(content), save=True)
+    except IntegrityError:
+        # Another worker stored the same bytes first
+        document.file.delete(save=False)
+        return Document.objects.get(content_hash=content_hash)
+    return document
+
+def run_job(job):
+    try:
+        content = render(job, job.requested_by)
+        job.document = store_document(job, content)
+        job.status = 'done'
+        job.error = ''
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e) or e.__class__.__name__
+        logger.error(f"Report job {job.id} ({job.report_type}) failed: {job.error}")
+    finally:
+        close_old_connections()
+    job.claim_token = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['document', 'status', 'error', 'claim_token', 'finished_at'])
+    return job
+
+def claim(batch_size):
+    """Atomically take up to batch_size queued jobs for this worker."""
+    now = timezone.now()
+    due = Q(status='queued') | Q(status='running', claimed_at__lt=now - CLAIM_TIMEOUT)
+    ids = list(ReportJob.objects.filter(due).order_by('created_at').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    ReportJob.objects.filter(due, id__in=ids).update(status='running', claim_token=token, claimed_at=now)
+    return list(ReportJob.objects.filter(claim_token=token, status='running').select_related('requested_by'))
+
+class ReportWorker:
+    """Renders queued report jobs on a thread pool, woken by request_report() and polling.
+
+    With REPORT_INPROCESS_WORKER the web process starts it on first use as a daemon
+    thread; otherwise run it with the process_reports command.
+    """
+
+    def __init__(self, threads, poll_seconds):
+        self.threads = threads
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        if not settings.REPORT_INPROCESS_WORKER:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run_forever, name='report-jobs', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def drain(self):
+        """Run jobs until the queue is empty. Returns the number of jobs run."""
+        total = 0
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            while True:
+                try:
+                    jobs = claim(self.threads)
+                except Exception as e:
+                    logger.error(f"Error claiming report jobs: {str(e)}")
+                    break
+                finally:
+                    close_old_connections()
+                if not jobs:
+                    break
+                list(pool.map(run_job, jobs))
+                total += len(jobs)
+        return total
+
+    def run_forever(self):
+        while True:
+            self._wakeup.clear()
+            self.drain()
+            self._wakeup.wait(self.poll_seconds)
+
+report_worker = ReportWorker(settings.REPORT_WORKER_THREADS, settings.REPORT_POLL_SECONDS)
+
+def serialize(job):
+    return {
+        'id': job.id,
+        'report_type': job.report_type,
+        'format': job.format,
+        'params': job.params,
+        'status': job.status,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'document': {
+            'name': job.document.name,
+            'content_type': job.document.content_type,
+            'size': job.document.size,
+            'content_hash': job.document.content_hash,
+        } if job.document_id else None,
+    }
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from reports.jobs import report_worker
+from reports.models import ReportJob
+
+class Command(BaseCommand):
+    help = 'Render queued report jobs into stored documents.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run what is queued now and exit instead of running as a worker.')
+
+    def handle(self, *args, **options):
+        if not options['once']:
+            self.stdout.write(f"Report worker running with {report_worker.threads} threads...")
+            report_worker.run_forever()
+        ran = report_worker.drain()
+        counts = dict(ReportJob.objects.order_by().values_list('status').annotate(n=Count('id')))
+        self.stdout.write(
+            f"Ran {ran} report jobs. Queued {counts.get('queued', 0)}, "
+            f"done {counts.get('done', 0)}, failed {counts.get('failed', 0)}."
+        )
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(max_length=50)),
+                ('format', models.CharField(max_length=10)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('rows_exported', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dataset', 'format'), name='exportwatermark_unique_dataset')],
+            },
+        ),
+    ]
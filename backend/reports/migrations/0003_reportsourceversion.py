@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_exportwatermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSourceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db import models
+
+class Document(models.Model):
+    """A stored report artifact. Identical content is stored once (content_hash)."""
+    name = models.CharField(max_length=255)
+    file = models.FileField(upload_to='reports/')
+    content_type = models.CharField(max_length=100)
+    content_hash = models.CharField(max_length=64, unique=True)
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+class ReportJob(models.Model):
+    """One request to render a report; rendered by reports.jobs outside the request."""
+    FORMATS = (
+        ('json', 'JSON'),
+        ('csv', 'CSV'),
+        ('pdf', 'PDF'),
+    )
+    STATUSES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    report_type = models.CharField(max_length=50)
+    format = models.CharField(max_length=10, choices=FORMATS, default='json')
+    params = models.JSONField(default=dict, blank=True)
+    # Hash of report type, format, params and viewer scope; equal keys render equal reports
+    cache_key = models.CharField(max_length=64)
+    # Fingerprint of the source tables when the job was queued
+    data_version = models.CharField(max_length=64)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='report_jobs')
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['cache_key', 'data_version', 'status'], name='reportjob_cache_idx'),
+            models.Index(fields=['status', 'created_at'], name='reportjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.report_type} ({self.format}) - {self.status}"
+
+class ExportWatermark(models.Model):
+    """How far reports.columnar has exported a dataset in one format: (watermark, last_id)."""
+    dataset = models.CharField(max_length=50)
+    format = models.CharField(max_length=10)
+    watermark = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    rows_exported = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dataset', 'format'], name='exportwatermark_unique_dataset'),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset} ({self.format}) up to {self.watermark}"
+
+class ReportSourceVersion(models.Model):
+    """Write counter for a report source table, bumped from signals; see reports.generators.touch_sources."""
+    label = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.label} v{self.version}"
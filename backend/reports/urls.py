@@ -1,3 +1,12 @@
 from django.urls import path
+from . import views
 
-urlpatterns = [] 
\ No newline at end of file
+urlpatterns = [
+    path('types/', views.report_types, name='report_types'),
+    path('jobs/', views.create_report_job, name='create_report_job'),
+    path('jobs/<int:job_id>/', views.report_job_detail, name='report_job_detail'),
+    path('jobs/<int:job_id>/download/', views.report_job_download, name='report_job_download'),
+    path('columnar/', views.columnar_datasets, name='columnar_datasets'),
+    path('columnar/export/', views.columnar_export, name='columnar_export'),
+    path('columnar/<str:dataset>/stream/', views.columnar_stream, name='columnar_stream'),
+]
@@ -0,0 +1,121 @@
+from django.http import FileResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from core.permissions import IsAdmin
+from core.utils import log_audit_action
+from reports import columnar, jobs
+from reports.generators import REPORTS
+from reports.models import ExportWatermark, ReportJob
+
+def _get_job(request, job_id):
+    job = ReportJob.objects.select_related('document').filter(id=job_id).first()
+    if job is None or (job.requested_by_id != request.user.id and request.user.user_type != 'admin'):
+        return None
+    return job
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_types(request):
+    return Response({'reports': [
+        {'name': report.name, 'title': report.title}
+        for report in REPORTS.values() if report.allowed(request.user)
+    ]})
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_report_job(request):
+    """Queue a report: {"report_type": ..., "format": "json"|"csv"|"pdf", "params": {...}}."""
+    params = request.data.get('params') or {}
+    if not isinstance(params, dict):
+        return Response({'detail': 'params must be an object.'}, status=400)
+    try:
+        job, cached = jobs.request_report(request.user, request.data.get('report_type'), request.data.get('format', 'json'), params)
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=400)
+    except PermissionError as e:
+        return Response({'detail': str(e)}, status=403)
+    log_audit_action(request.user, 'generate_report', 'ReportJob', details={'type': job.report_type, 'format': job.format, 'cached': cached})
+    return Response(dict(jobs.serialize(job), cached=cached), status=200 if job.status == 'done' else 202)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_job_detail(request, job_id):
+    job = _get_job(request, job_id)
+    if job is None:
+        return Response({'detail': 'Not found.'}, status=404)
+    return Response(jobs.serialize(job))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_job_download(request, job_id):
+    job = _get_job(request, job_id)
+    if job is None:
+        return Response({'detail': 'Not found.'}, status=404)
+    if job.status != 'done' or job.document is None:
+        return Response({'detail': f'Report is {job.status}.'}, status=409)
+    return FileResponse(job.document.file.open('rb'), as_attachment=True, filename=job.document.name, content_type=job.document.content_type)
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def columnar_datasets(request):
+    marks = {(m.dataset, m.format): m for m in ExportWatermark.objects.all()}
+    return Response({'datasets': [
+        {
+            'name': name,
+            'columns': dataset.fields,
+            'watermarks': {
+                fmt: marks[(name, fmt)].watermark.isoformat() if marks.get((name, fmt)) and marks[(name, fmt)].watermark else None
+                for fmt in columnar.EXTENSIONS
+            },
+        }
+        for name, dataset in columnar.DATASETS.items()
+    ]})
+
+@api_view(['POST'])
+@permission_classes([IsAdmin])
+def columnar_export(request):
+    """Run an incremental export to COLUMNAR_EXPORT_DIR: {"datasets": [...], "format": "parquet"|"arrow", "full": false}."""
+    names = request.data.get('datasets') or list(columnar.DATASETS)
+    if not isinstance(names, list):
+        return Response({'detail': 'datasets must be a list.'}, status=400)
+    unknown = [name for name in names if name not in columnar.DATASETS]
+    if unknown:
+        return Response({'detail': f"Unknown datasets: {', '.join(map(str, unknown))}."}, status=400)
+    results = []
+    try:
+        for name in names:
+            result = columnar.export_dataset(name, request.data.get('format', 'parquet'), full=bool(request.data.get('full')))
+            results.append(dict(result, files=len(result['files'])))
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=400)
+    except RuntimeError as e:
+        return Response({'detail': str(e)}, status=503)
+    log_audit_action(request.user, 'export_columnar', 'ExportWatermark', details={'datasets': names})
+    return Response({'results': results})
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def columnar_stream(request, dataset):
+    """
+    Rows changed since ?since=<cursor> as an Arrow IPC stream. The X-Next-Cursor header
+    is the cursor for the following pull.
+    """
+    if columnar.pa is None:
+        return Response({'detail': 'pyarrow is required for columnar exports.'}, status=503)
+    if dataset not in columnar.DATASETS:
+        return Response({'detail': 'Not found.'}, status=404)
+    try:
+        since = columnar.decode_cursor(request.GET['since']) if request.GET.get('since') else None
+    except ValueError:
+        return Response({'detail': 'Invalid cursor.'}, status=400)
+    spec = columnar.DATASETS[dataset]
+    # Fixed upper bound so the next cursor is known before the body is streamed
+    until = columnar.high_water_mark(spec)
+    if until is None or (since is not None and until <= since):
+        until = since
+    response = StreamingHttpResponse(columnar.arrow_stream(spec, since, until), content_type='application/vnd.apache.arrow.stream')
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.arrows"'
+    response['X-Next-Cursor'] = columnar.encode_cursor(*until) if until is not None else ''
+    log_audit_action(request.user, 'export_columnar', 'ExportWatermark', details={'dataset': dataset, 'since': request.GET.get('since')})
+    return response